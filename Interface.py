@@ -303,9 +303,9 @@ class Interface(object) :
         #(in scientific notation with limited significant digits)
         self.speedlabel['text'] = '%.1e' % self.world.scene.simul_speed, 2
         #update clock display
-        new_time = self.world.scene.simul_time.isoformat().split("T")
-        self.datelabel['text'] = new_time[0]
-        self.timelabel['text'] = new_time[1].split(".")[0]
+        new_date, new_time = self.world.scene.simul_date()
+        self.datelabel['text'] = new_date
+        self.timelabel['text'] = new_time
         #follow window resize
         w, h = base.win.getXSize(), base.win.getYSize()
         bw, bh = BUTTONSIZE
@@ -7,8 +7,7 @@ from direct.task import Task
 from direct.interval.LerpInterval import LerpFunc
 from direct.interval.IntervalGlobal import Sequence, Func
 #Work with time
-from datetime import datetime, timedelta
-import calendar
+from datetime import datetime
 
 import math
 import astronomia.calendar
@@ -109,9 +108,14 @@ class Planetoid(object) :
             self.has_axis = False
             fade.start()
 
-    def rotate(self, julian_time) :
+    def rotate(self, julian_time, day_fraction=0.) :
         '''rotate on itself according to time'''
-        self.mod.setHpr((360 / self.period) * julian_time % 360 + self.offset, 0, 0)
+        heading = self.rotation(julian_time, day_fraction) + self.offset
+        self.mod.setHpr(heading, 0, 0)
+
+    def rotation(self, julian_time, day_fraction) :
+        '''rotation angle in degrees, uniform with period'''
+        return (360 / self.period) * (julian_time + day_fraction) % 360
     
     def place(self) :
         '''set position and scale'''
@@ -155,10 +159,10 @@ class Orbital(Planetoid) :
          + self.orbit_offset)
         self.root.setHpr(coord , 0, 0)
     
-    def rotate(self, time) :
+    def rotate(self, julian_time, day_fraction=0.) :
         '''rotate on itself and around gravity center'''
-        Planetoid.rotate(self, time)
-        self.orbit(time)
+        Planetoid.rotate(self, julian_time, day_fraction)
+        self.orbit(julian_time + day_fraction)
     
     def place(self) :
         Planetoid.place(self)
@@ -219,6 +223,15 @@ class Orbital(Planetoid) :
             fade.start()
 
 
+class Earth(Orbital) :
+    '''orbital turning with the sidereal time, offset aligns the texture'''
+    def rotation(self, julian_time, day_fraction) :
+        '''apparent sidereal time at Greenwich in degrees'''
+        return math.degrees(
+            astronomia.calendar.sidereal_time_greenwich_apparent(
+            julian_time, day_fraction))
+
+
 class System(object) :
     '''sun earth and moon
     plus sky and lights
@@ -257,7 +270,7 @@ class System(object) :
         self.sun = Planetoid('sun', self.root, 'sun_1k_tex.jpg',
         SUNRADIUS_F, SUNROT, 0)
 
-        self.earth = Orbital('earth', self.root, 'earth_1k_tex.jpg',
+        self.earth = Earth('earth', self.root, 'earth_1k_tex.jpg',
         EARTHRADIUS_F, 1, EARTHROTSET, self.root,
         EARTHREVO, EPHEMSIMPLESET, self.ua)
 
@@ -355,9 +368,9 @@ class System(object) :
         self.placeLight()
         self.sky.setScale(10*self.earth.distance)
     
-    def rotate(self, time) :
+    def rotate(self, julian_time, day_fraction=0.) :
         for obj in [self.sun, self.earth, self.moon] :
-            obj.rotate(time)
+            obj.rotate(julian_time, day_fraction)
     
     def lockTask(self, task) :
         """alignment contraints""" 
@@ -411,20 +424,17 @@ def linInt(level, v1, v2) :
     according to 0<level<1 '''
     return v1 * level + v2 * (1 - level)
 
-def stamp_to_time(t) :
-    '''posix timestamp to datetime object'''
-    return datetime.utcfromtimestamp(int(t))
-    
-def time_to_stamp(t):
-    '''time object converted in timestamp'''
-    return calendar.timegm(t.timetuple())
+#The scene clock is a day number (see astronomia.calendar) and the
+#seconds elapsed since midnight, limited to the range of the calendar
+FIRSTDAY = int(astronomia.calendar.cal_to_day_number(
+    -astronomia.calendar.proleptic_year_limit, 1, 1))
+LASTDAY = int(astronomia.calendar.cal_to_day_number(
+    astronomia.calendar.proleptic_year_limit, 12, 31))
 
-def time_to_julian(t) :
-    '''time object converted in days as float'''
-    julian_time = astronomia.calendar.cal_to_jde(t.year,
-    t.month, t.day, t.hour, t.minute, t.second,
-    gregorian=True)
-    return julian_time
+def normalize_time(day, secs) :
+    '''carry whole days of secs over to the day number'''
+    carry = math.floor(secs / 86400.)
+    return day + int(carry), secs - carry * 86400.
 
 
 class Scene(object) :
@@ -486,7 +496,25 @@ class Scene(object) :
 
     def time_is_now(self) :
         self.simul_speed = 1
-        self.simul_time = datetime.utcnow()
+        now = datetime.utcnow()
+        self.set_date(now.year, now.month, now.day, now.hour, now.minute,
+            now.second + now.microsecond / 1e6)
+
+    def set_date(self, year, mon, day, hour=0, minute=0, sec=0.) :
+        '''set simulation time from a proleptic Gregorian date in UT,
+        years in astronomical numbering (0 = 1BC)'''
+        self.simul_day = int(astronomia.calendar.cal_to_day_number(
+            year, mon, day))
+        self.simul_secs = hour * 3600. + minute * 60. + sec
+
+    def simul_date(self) :
+        '''simulation date and time as ('YYYY-MM-DD', 'HH:MM:SS')'''
+        year, mon, day = astronomia.calendar.day_number_to_cal(
+            self.simul_day)
+        secs = int(self.simul_secs)
+        sign = '-' if year < 0 else ''
+        return ('%s%04d-%02d-%02d' % (sign, abs(year), mon, day),
+            '%02d:%02d:%02d' % (secs // 3600, secs // 60 % 60, secs % 60))
     
     def changeSpeed(self, factor):
         #if simulation is paused change previous speed
@@ -544,26 +572,26 @@ class Scene(object) :
         return slow, fast
 
     def warp_time(self, value):
-        '''interpolate simul_time between self.warp_init and self.warp_end
+        '''interpolate simulation time between self.warp_init and
+        self.warp_init + self.jump_len
         '''
         if value == 0:
             self.jumping = False
         elif value == 1:
             self.jumping = True
-        init = time_to_stamp(self.warp_init)
-        end = time_to_stamp(self.warp_end)
-        t = linInt(value, init, end)
-        self.simul_time = stamp_to_time(t)
+        day, secs = self.warp_init
+        offset = linInt(value, 0., self.jump_len)
+        self.simul_day, self.simul_secs = normalize_time(day, secs + offset)
     
     def time_jump(self, jump_len):
         '''jump softly in time'''
-        self.jump_len = timedelta(days=jump_len)
-        self.warp_init = self.simul_time
-        #datetime object is limited between year 1 and year 9999
-        try :
-            self.warp_end = self.simul_time + self.jump_len
-        except OverflowError :
-            self.warp_end = self.warp_init
+        self.jump_len = jump_len * 86400.
+        self.warp_init = (self.simul_day, self.simul_secs)
+        #stay in the range of the calendar
+        end, secs = normalize_time(self.simul_day,
+            self.simul_secs + self.jump_len)
+        if not FIRSTDAY <= end <= LASTDAY :
+            self.jump_len = 0.
         
         warp = LerpFunc(self.warp_time,
              fromData=1,
@@ -578,16 +606,17 @@ class Scene(object) :
         # get passed time
         dt = globalClock.getDt()
         if not self.jumping:
-            #datetime object is limited between year 1 and year 9999
-            try :
-                #keep simulation time updated each frame
-                self.simul_time +=  timedelta(seconds=dt * self.simul_speed)
-            except OverflowError :
-                if self.simul_speed < 0 :
-                    self.simul_time =  datetime.min
-                else :
-                    self.simul_time = datetime.max
+            #keep simulation time updated each frame
+            day, secs = normalize_time(self.simul_day,
+                self.simul_secs + dt * self.simul_speed)
+            #stop at the ends of the calendar, years -100000 and 100000
+            if day < FIRSTDAY :
+                day, secs = FIRSTDAY, 0.
+                self.simul_speed = 0.
+            elif day > LASTDAY :
+                day, secs = LASTDAY, 86399.
                 self.simul_speed = 0.
+            self.simul_day, self.simul_secs = day, secs
         
         return Task.cont
 
@@ -628,7 +657,8 @@ class Scene(object) :
     
     def placeTask(self, task) :
         self.sys.place()
-        self.sys.rotate(time_to_julian(self.simul_time))
+        #split time keeps the daily rotation precise
+        self.sys.rotate(self.simul_day - 0.5, self.simul_secs / 86400.)
         return Task.cont
     
     #Vizualisation control
@@ -24,6 +24,7 @@
 """__init__.py for astronomia"""
 
 __all__ = ["calendar",
+           "chebyshev",
            "constants",
            "coordinates",
            "dynamical",
@@ -31,7 +32,9 @@ __all__ = ["calendar",
            "equinox",
            "globals",
            "nutation",
+           "observer",
            "riseset",
+           "scalar",
            "sun",
            "util",
            "planets"]
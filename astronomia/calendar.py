@@ -28,7 +28,8 @@ from __future__ import division
 """A collection of date and time functions.
 
 The functions which use Julian Day Numbers are valid only for positive values,
-i.e., for dates after -4712 (4713BC).
+i.e., for dates after -4712 (4713BC), except cal_to_day_number() and
+day_number_to_cal(), which work on integer day numbers over +-100000 years.
 
 Unless otherwise specified, Julian Day Numbers may be fractional values.
 
@@ -48,7 +49,8 @@ from math import modf
 import numpy as np
 
 from astronomia.util import d_to_r, modpi2, _scalar_if_one
-from astronomia.constants import minutes_per_day, seconds_per_day
+from astronomia.constants import pi2, minutes_per_day, seconds_per_day
+from astronomia.observer import Observer
 import astronomia.globals
 
 
@@ -172,17 +174,71 @@ def cal_to_jd(year, mon=1, day=1, gregorian=True):
                              mon[~leapyeartest] == 2)):
         raise ValueError('Day must be from 1 to 28')
 
-    testarr = mon <= 2
-    year[testarr] -= 1
-    mon[testarr] += 12
+    return _scalar_if_one(cal_to_jd_unchecked(year, mon, day, gregorian))
+
+
+def cal_to_jd_unchecked(year, mon=1, day=1, gregorian=True):
+    """Convert a date in the Julian or Gregorian calendars to the Julian Day
+    Number (Meeus 7.1), without validating the date.
+
+    Same as cal_to_jd(), for callers which already know that the year and
+    month are integers and that the day exists in the month. Invalid dates
+    give meaningless results instead of raising ValueError.
+
+    Arguments:
+      - `year` : (int) year, scalar or array
+
+    Keywords:
+      - `mon`       : (int, default=1) month, scalar or array
+      - `day`       : (int, float, default=1) day, may be fractional day
+      - `gregorian` : (bool, default=True) If True, use Gregorian calendar,
+        else use Julian calendar
+
+    Returns:
+      - (float) scalar, or array with the broadcast shape of the arguments
+
+    """
+    early = np.less_equal(mon, 2)
+    year = year - early
+    mon = mon + 12*early
     if gregorian:
-        A = (year / 100).astype(np.int64)
-        B = 2 - A + (A / 4).astype(np.int64)
+        A = np.trunc(year / 100.0)
+        B = 2 - A + np.trunc(A / 4.0)
     else:
         B = 0
-    return _scalar_if_one(
-        (365.25*(year + 4716)).astype(np.int64) +
-        (30.6001*(mon + 1)).astype(np.int64) + day + B - 1524.5)
+    return (np.trunc(365.25*(year + 4716)) +
+            np.trunc(30.6001*(mon + 1)) + day + B - 1524.5)
+
+
+#
+# Julian Day of the POSIX epoch, 1970-01-01 00:00 UTC
+#
+_jd_posix_epoch = 2440587.5
+
+
+def datetime64_to_jd(t):
+    """Convert times to Julian Days, without any validation.
+
+    The conversion is a single subtraction and division, so it is suited to
+    per-frame and bulk conversions. Dates are in the proleptic Gregorian
+    calendar, as numpy.datetime64 is.
+
+    Arguments:
+      - `t` : numpy.datetime64 or datetime.datetime values, scalar or
+        array, or seconds since 1970-01-01 00:00 UTC as numbers
+
+    Returns:
+      - Julian Day : (float) scalar, or array with the shape of `t`
+
+    """
+    t = np.asarray(t)
+    if t.dtype == object:
+        t = t.astype("datetime64[us]")
+    if np.issubdtype(t.dtype, np.datetime64):
+        days = (t - np.datetime64(0, "s"))/np.timedelta64(1, "D")
+    else:
+        days = t/seconds_per_day
+    return _scalar_if_one(days + _jd_posix_epoch)
 
 
 def jd_to_cal(julian_day, gregorian=True):
@@ -218,6 +274,106 @@ def jd_to_cal(julian_day, gregorian=True):
     year[mon > 2] = C[mon > 2] - 4716
     return _scalar_if_one(year), _scalar_if_one(mon), _scalar_if_one(day)
 
+#
+# Proleptic calendars on int64 day numbers. The day number of a date is the
+# Julian Day at noon of that date, so that it is an integer; the date begins
+# at day number - 0.5. Floor division keeps the arithmetic exact for negative
+# years and Julian Days, unlike the truncations of Meeus 7.1.
+#
+proleptic_year_limit = 100000
+
+
+def cal_to_day_number(year, mon=1, day=1, gregorian=True):
+    """Convert dates in the proleptic Julian or Gregorian calendars to
+    integer day numbers.
+
+    Valid for years -100000 to 100000 in astronomical numbering, including
+    dates before -4712. Days past the end of a month carry over to the
+    following months.
+
+    Arguments:
+      - `year` : (int) year, scalar or array
+
+    Keywords:
+      - `mon`       : (int, default=1) month, scalar or array
+      - `day`       : (int, default=1) day, scalar or array
+      - `gregorian` : (bool, default=True) If True, use Gregorian calendar,
+        else use Julian calendar
+
+    Returns:
+      - day number : (int64) Julian Day at noon of the date, scalar or array
+        with the broadcast shape of the arguments
+
+    """
+    year = np.asarray(year, dtype=np.int64)
+    mon = np.asarray(mon, dtype=np.int64)
+    day = np.asarray(day, dtype=np.int64)
+    if np.any(np.abs(year) > proleptic_year_limit):
+        raise ValueError('Year must be from -100000 to 100000')
+    if np.any(mon > 12) or np.any(mon < 1):
+        raise ValueError('Month must be from 1 to 12')
+
+    # years begin in March, so that the leap day is the last of the year
+    early = mon <= 2
+    y = year + 4800 - early
+    m = mon + 12*early - 3
+    dn = day + (153*m + 2)//5 + 365*y + y//4
+    if gregorian:
+        return _scalar_if_one(dn - y//100 + y//400 - 32045)
+    return _scalar_if_one(dn - 32083)
+
+
+def day_number_to_cal(day_number, gregorian=True):
+    """Convert integer day numbers to dates in the proleptic Julian or
+    Gregorian calendars.
+
+    The inverse of cal_to_day_number().
+
+    Arguments:
+      - `day_number` : (int) Julian Day at noon of the date, scalar or array
+
+    Keywords:
+      - `gregorian` : (bool, default=True) If True, use Gregorian calendar,
+        else use Julian calendar
+
+    Returns:
+      - (year, month, day) : (tuple) of int64 scalars or arrays
+
+    """
+    day_number = np.asarray(day_number, dtype=np.int64)
+    if gregorian:
+        a = day_number + 32044
+        b = (4*a + 3)//146097
+        c = a - 146097*b//4
+    else:
+        b = 0
+        c = day_number + 32082
+    d = (4*c + 3)//1461
+    e = c - 1461*d//4
+    m = (5*e + 2)//153
+    late = m//10
+    day = e - (153*m + 2)//5 + 1
+    mon = m + 3 - 12*late
+    year = 100*b + d - 4800 + late
+    return _scalar_if_one(year), _scalar_if_one(mon), _scalar_if_one(day)
+
+
+def jd_to_day_number(julian_day):
+    """Split Julian Days into day numbers and the time since midnight.
+
+    Arguments:
+      - `julian_day` : (float) Julian Day, scalar or array
+
+    Returns:
+      - day number : (int64) see cal_to_day_number()
+      - fraction of day since 0h : (float) 0.0..1.0
+
+    """
+    julian_day = np.asarray(julian_day, dtype=np.float64) + 0.5
+    day_number = np.floor(julian_day)
+    return (_scalar_if_one(day_number.astype(np.int64)),
+            _scalar_if_one(julian_day - day_number))
+
 
 def cal_to_jde(year, mon=1, day=1, hour=0, minute=0, sec=0.0, gregorian=True):
     """Convert a date in the Julian or Gregorian calendars to the Julian Day
@@ -243,6 +399,23 @@ def cal_to_jde(year, mon=1, day=1, hour=0, minute=0, sec=0.0, gregorian=True):
     return _scalar_if_one(jde + hms_to_fday(hour, minute, sec))
 
 
+def cal_to_jde_unchecked(year, mon=1, day=1, hour=0, minute=0, sec=0.0,
+                         gregorian=True):
+    """Convert a date and time in the Julian or Gregorian calendars to the
+    Julian Day Ephemeris, without validating the date.
+
+    Same as cal_to_jde(), see cal_to_jd_unchecked().
+
+    Returns:
+      - julian day ephemeris : (float) scalar, or array with the broadcast
+        shape of the arguments
+
+    """
+    return (cal_to_jd_unchecked(year, mon, day, gregorian) +
+            (hour / 24.0) + (minute / minutes_per_day) +
+            (sec / seconds_per_day))
+
+
 def cal_to_day_of_year(year, mon, day, gregorian=True):
     """Convert a date in the Julian or Gregorian calendars to day of the year
     (Meeus 7.1).
@@ -347,7 +520,7 @@ def fday_to_hms(day):
     """Convert fractional day (0.0..1.0) to integral hours, minutes, seconds.
 
     Arguments:
-      - day : a fractional day in the range 0.0..1.0
+      - day : a fractional day in the range 0.0..1.0, scalar or array
 
     Returns:
       - hour : (int, 0..23)
@@ -356,13 +529,15 @@ def fday_to_hms(day):
 
     """
     # First get rid of the integer day
-    fday, days = modf(day)
+    fday, days = np.modf(np.atleast_1d(day))
     seconds = fday * 86400.0
-    minutes = int(seconds / 60.0)
+    minutes = np.trunc(seconds / 60.0)
     seconds = seconds - (minutes * 60.0)
-    hours = int(minutes / 60.0)
+    hours = np.trunc(minutes / 60.0)
     minutes = minutes - (hours * 60.0)
-    return int(hours), int(minutes), int(seconds)
+    return (_scalar_if_one(hours.astype(np.int64)),
+            _scalar_if_one(minutes.astype(np.int64)),
+            _scalar_if_one(seconds.astype(np.int64)))
 
 
 def hms_to_fday(hr, mn, sec):
@@ -381,7 +556,8 @@ def hms_to_fday(hr, mn, sec):
     mn = np.atleast_1d(mn)
     sec = np.atleast_1d(sec)
     hr, mn, sec = np.broadcast_arrays(hr, mn, sec)
-    return ((hr / 24.0) + (mn / minutes_per_day) + (sec / seconds_per_day))
+    return _scalar_if_one(
+        (hr / 24.0) + (mn / minutes_per_day) + (sec / seconds_per_day))
 
 
 def is_dst(julian_day):
@@ -392,7 +568,7 @@ def is_dst(julian_day):
 
     Arguments:
       - `julian_day` : (int) Julian Day number representing an instant in
-        Universal Time
+        Universal Time, scalar or array
 
     Returns:
       - (bool) True if Daylight Savings Time is in effect, False otherwise.
@@ -401,11 +577,18 @@ def is_dst(julian_day):
     import time
     import datetime
 
-    year, mon, day = jd_to_cal(julian_day)
-    hr, minute, second = fday_to_hms(julian_day)
+    shape = np.shape(julian_day)
+    year, mon, day = [np.atleast_1d(x)
+                      for x in jd_to_cal(np.ravel(julian_day))]
+    hr, minute, second = [np.atleast_1d(x) for x in fday_to_hms(day)]
+    day = np.trunc(day)
 
-    stamp = datetime.datetime(year, mon, day, hr, minute, second)
-    return time.localtime(time.mktime(stamp.timetuple())).tm_isdst == 1
+    # the time zone database can only be queried one instant at a time
+    dst = np.array([
+        time.localtime(time.mktime(datetime.datetime(
+            *[int(field) for field in fields]).timetuple())).tm_isdst == 1
+        for fields in zip(year, mon, day, hr, minute, second)])
+    return _scalar_if_one(dst.reshape(shape))
 
 
 def is_leap_year(year, gregorian=True):
@@ -480,16 +663,26 @@ def lt_to_str(julian_day, zone="", level="second"):
     your own zone formatting in the calling module.
 
     Arguments:
-      - `julian_day` : (int) Julian Day number
+      - `julian_day` : (int) Julian Day number, scalar or array
 
     Keywords:
-      - `zone`  : (str, default="") Time zone string
+      - `zone`  : (str, default="") Time zone string, or an array of them
+        broadcasting with `julian_day` as returned by ut_to_lt()
       - level : (str, default="second") {"day", "hour", "minute", "second"}
 
     Return:
-      - formatted date/time string : (str)
+      - formatted date/time string : (str), or an array of them with the
+        broadcast shape of the arguments
 
     """
+    if np.ndim(julian_day) or np.ndim(zone):
+        julian_day, zone = np.broadcast_arrays(np.asarray(julian_day),
+                                               np.asarray(zone))
+        return np.array([
+            lt_to_str(float(jd), str(z), level)
+            for jd, z in zip(julian_day.ravel(), zone.ravel())]).reshape(
+                julian_day.shape)
+
     year, mon, day = jd_to_cal(julian_day)
     fday, iday = modf(day)
     iday = int(iday)
@@ -512,48 +705,131 @@ def lt_to_str(julian_day, zone="", level="second"):
     raise Error("unknown time level = " + level)
 
 
-def sidereal_time_greenwich(julian_day):
-    """Return the mean sidereal time at Greenwich.
+def sidereal_time_greenwich(julian_day, day_fraction=0.0):
+    """Return the mean sidereal time at Greenwich (Meeus 12.4).
 
-    The Julian Day number must represent Universal Time.
+    The Julian Day number must represent Universal Time. It may be split in
+    two parts, e.g. a day number - 0.5 and the fraction of day since 0h, so
+    that the rotation within the day keeps its full precision.
 
     Arguments:
-      - `julian_day` : (int) Julian Day number
+      - `julian_day` : (float) Julian Day number, scalar or array
+
+    Keywords:
+      - `day_fraction` : (float, default=0.0) days added to `julian_day`
 
     Returns:
       - sidereal time in radians : (float) 2pi radians = 24 hours
 
     """
-    T = jd_to_jcent(julian_day)
+    d = (julian_day - 2451545.0) + day_fraction
+    # whole turns of the 360 degrees per day are dropped before the sum
+    f = np.fmod(julian_day, 1.0) + np.fmod(day_fraction, 1.0)
+    T = d / 36525.0
     T2 = T * T
     T3 = T2 * T
-    theta0 = 280.46061837 + \
-        360.98564736629*(julian_day - 2451545.0) + \
+    theta0 = 280.46061837 + 360.0*f + \
+        0.98564736629*d + \
         0.000387933*T2 - \
         T3/38710000
     result = d_to_r(theta0)
-    return modpi2(result)
+    return _scalar_if_one(modpi2(result))
+
 
+def sidereal_time_greenwich_apparent(julian_day, day_fraction=0.0):
+    """Return the apparent sidereal time at Greenwich.
 
-def ut_to_lt(julian_day):
+    The mean sidereal time corrected by the equation of the equinoxes, the
+    nutation in longitude projected on the equator (Meeus chapter 12).
+
+    Arguments:
+      - `julian_day` : (float) Julian Day number in Universal Time, scalar
+        or array
+
+    Keywords:
+      - `day_fraction` : (float, default=0.0) days added to `julian_day`,
+        see sidereal_time_greenwich()
+
+    Returns:
+      - sidereal time in radians : (float) 2pi radians = 24 hours
+
+    """
+    # nutation imports this module
+    from astronomia.nutation import nutation, obliquity
+
+    jd = julian_day + day_fraction
+    dpsi, deps = nutation(jd)
+    eqeq = dpsi*np.cos(obliquity(jd) + deps)
+    return _scalar_if_one(
+        modpi2(sidereal_time_greenwich(julian_day, day_fraction) + eqeq))
+
+
+def earth_rotation_angle(julian_day, day_fraction=0.0):
+    """Return the Earth Rotation Angle.
+
+    The angle between the Celestial and the Terrestrial Intermediate Origins,
+    a linear function of Universal Time (IERS Conventions 2010, 5.15). It
+    leaves out precession, so that it drifts from sidereal time by about 1.3
+    degrees per century.
+
+    Arguments:
+      - `julian_day` : (float) Julian Day number in Universal Time, scalar
+        or array
+
+    Keywords:
+      - `day_fraction` : (float, default=0.0) days added to `julian_day`,
+        see sidereal_time_greenwich()
+
+    Returns:
+      - angle in radians : (float)
+
+    """
+    d = (julian_day - 2451545.0) + day_fraction
+    f = np.fmod(julian_day, 1.0) + np.fmod(day_fraction, 1.0)
+    return _scalar_if_one(
+        modpi2(pi2*(f + 0.7790572732640 + 0.00273781191135448*d)))
+
+
+def ut_to_lt(julian_day, observer=None):
     """Convert universal time in Julian Days to a local time.
 
-    Include Daylight Savings Time offset, if any.
+    Include Daylight Savings Time offset, if the observer has a daylight
+    savings time zone.
 
     Arguments:
-      - `julian_day` : (int) Julian Day number, universal time
+      - `julian_day` : (int) Julian Day number, universal time, scalar or
+        array
+
+    Keywords:
+      - `observer` : (Observer, default=None) the time zones of the
+        observer are used, Observer.from_globals() when None
 
     Return:
       - Julian Day number : (str) local time
-        zone string of the zone used for the conversion
+        zone string of the zone used for the conversion, or an array of
+        them for array input
 
     """
-    if is_dst(julian_day):
-        zone = astronomia.globals.daylight_timezone_name
-        offset = astronomia.globals.daylight_timezone_offset
+    if observer is None:
+        observer = Observer.from_globals()
+    if observer.daylight_timezone_name is None:
+        dst = np.zeros(np.shape(julian_day), dtype=bool)
     else:
-        zone = astronomia.globals.standard_timezone_name
-        offset = astronomia.globals.standard_timezone_offset
-
-    julian_day = julian_day - offset
-    return julian_day, zone
+        dst = np.asarray(is_dst(julian_day))
+    if np.ndim(dst) == 0:
+        if dst:
+            zone = observer.daylight_timezone_name
+            offset = observer.daylight_timezone_offset
+        else:
+            zone = observer.standard_timezone_name
+            offset = observer.standard_timezone_offset
+        return julian_day - offset, zone
+
+    zone = np.empty(dst.shape, dtype=object)
+    zone[dst] = observer.daylight_timezone_name
+    zone[~dst] = observer.standard_timezone_name
+    offset = np.empty(dst.shape)
+    if dst.any():
+        offset[dst] = observer.daylight_timezone_offset
+    offset[~dst] = observer.standard_timezone_offset
+    return julian_day - offset, zone
@@ -0,0 +1,268 @@
+"""
+    Copyright 2000, 2001 Astrolabe by William McClain
+
+    Forked in 2013 to Astronomia
+
+    Copyright 2013 Astronomia by Tim Cera
+
+    This file is part of Astronomia.
+
+    Astronomia is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    Astronomia is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Astronomia; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+    """
+
+"""Piecewise Chebyshev ephemerides.
+
+The positions given by the VSOP87d and ELP2000 models are fitted over a range
+of dates with Chebyshev polynomials on segments of equal length, in the
+manner of the JPL DE ephemerides. Evaluating a position afterwards costs a
+few multiply-adds per coordinate.
+
+Positions are rectangular ecliptic coordinates, so that the fit does not
+have to deal with the wrap around of longitudes:
+
+  - planets: heliocentric, in au (VSOP87d.dimension3)
+  - "Sun": geocentric, in au (Sun.dimension3)
+  - "Moon": geocentric, in km (Lunar.dimension3)
+
+"""
+
+import numpy as np
+
+from astronomia.util import modpi2, _scalar_if_one
+from astronomia.planets import VSOP87d, planet_names
+
+
+class Error(Exception):
+    """Local exception class"""
+    pass
+
+#
+# Initial segment length in days for each body. fit() halves it until the
+# requested tolerance is reached.
+#
+_segment_days = {
+    "Moon": 4.0,
+    "Mercury": 8.0,
+    "Venus": 16.0,
+    "Earth": 16.0,
+    "Sun": 16.0,
+    "Mars": 16.0,
+    "Jupiter": 32.0,
+    "Saturn": 32.0,
+    "Uranus": 32.0,
+    "Neptune": 32.0}
+
+
+def _rectangular_source(body):
+    """Return a function giving the (3, N) rectangular coordinates of a body
+    for a 1-D array of Julian Days.
+    """
+    if body == "Moon":
+        from astronomia.lunar import Lunar
+        dimension3 = Lunar().dimension3
+    elif body == "Sun":
+        from astronomia.sun import Sun
+        dimension3 = Sun().dimension3
+    elif body in planet_names:
+        vsop = VSOP87d()
+
+        def dimension3(jd):
+            return vsop.dimension3(jd, body)
+    else:
+        raise Error("unknown body = " + body)
+
+    def source(jd):
+        L, B, R = dimension3(jd)
+        L, B, R = np.broadcast_arrays(L, B, R)
+        cosB = np.cos(B)
+        return np.array([R*cosB*np.cos(L), R*cosB*np.sin(L), R*np.sin(B)])
+
+    return source
+
+
+def _nodes(degree):
+    """Return the Chebyshev nodes of the first kind in -1..1"""
+    k = np.arange(degree + 1)
+    return np.cos(np.pi*(k + 0.5)/(degree + 1))[::-1]
+
+
+def fit(body, jd_start, jd_end, tolerance, degree=13):
+    """Fit a Chebyshev ephemeris to one body.
+
+    The range is divided into segments of equal length, starting with the
+    default length for the body and halving it until the interpolation error,
+    checked halfway between the fitting nodes, is below `tolerance`.
+
+    Arguments:
+      - `body`      : "Sun", "Moon", or one of ("Mercury", "Venus", "Earth",
+        "Mars", "Jupiter", "Saturn", "Uranus", "Neptune")
+      - `jd_start`  : first Julian Day in dynamical time
+      - `jd_end`    : last Julian Day in dynamical time
+      - `tolerance` : maximum position error, in au (km for the Moon)
+
+    Keywords:
+      - `degree` : (int, default=13) degree of the polynomial of each segment
+
+    Returns:
+      - a ChebyshevEphemeris
+
+    """
+    if not jd_end > jd_start:
+        raise Error("empty range of dates")
+
+    source = _rectangular_source(body)
+    x = _nodes(degree)
+    xcheck = (x[:-1] + x[1:])/2.0
+    seg_days = _segment_days.get(body, 16.0)
+    for bailout in range(12):
+        nseg = int(np.ceil((jd_end - jd_start)/seg_days))
+        starts = jd_start + seg_days*np.arange(nseg)
+        half = seg_days/2.0
+
+        # one batched ephemeris call for the nodes of every segment
+        jd = (starts[:, None] + half*(x + 1.0)).ravel()
+        pos = source(jd).reshape(3, nseg, degree + 1)
+        coeffs = np.polynomial.chebyshev.chebfit(
+            x, pos.transpose(2, 1, 0).reshape(degree + 1, -1), degree)
+        coeffs = coeffs.reshape(degree + 1, nseg, 3).transpose(1, 2, 0)
+
+        eph = ChebyshevEphemeris(body, jd_start, seg_days, coeffs)
+        jd = (starts[:, None] + half*(xcheck + 1.0)).ravel()
+        error = np.abs(eph.position(jd) - source(jd)).max()
+        if error <= tolerance:
+            return eph
+        seg_days = half
+    raise Error("bailout")
+
+
+def load(path):
+    """Load a Chebyshev ephemeris written by ChebyshevEphemeris.save().
+
+    Arguments:
+      - `path` : name of the .npz file
+
+    Returns:
+      - a ChebyshevEphemeris
+
+    """
+    with np.load(path) as f:
+        return ChebyshevEphemeris(str(f["body"]), float(f["jd_start"]),
+                                  float(f["seg_days"]), f["coeffs"])
+
+
+class ChebyshevEphemeris:
+    """Positions of one body from piecewise Chebyshev polynomials.
+
+    Instances are created by fit() or load().
+
+    """
+    def __init__(self, body, jd_start, seg_days, coeffs):
+        """
+        Arguments:
+          - `body`     : name of the body
+          - `jd_start` : Julian Day at the start of the first segment
+          - `seg_days` : length of the segments in days
+          - `coeffs`   : (segments, 3, degree + 1) array of coefficients
+
+        """
+        self.body = body
+        self.jd_start = jd_start
+        self.seg_days = seg_days
+        self.coeffs = np.ascontiguousarray(coeffs, dtype=np.float64)
+        self.jd_end = jd_start + seg_days*self.coeffs.shape[0]
+        # derivative with respect to x in -1..1, converted to days
+        self.rates = np.polynomial.chebyshev.chebder(
+            self.coeffs, axis=2)*(2.0/seg_days)
+
+    def _locate(self, jd):
+        """Return segment indices and normalized times for an array of JD"""
+        if np.any(jd < self.jd_start) or np.any(jd > self.jd_end):
+            raise Error("date out of range of the ephemeris")
+        t = (jd - self.jd_start)/self.seg_days
+        idx = np.minimum(t.astype(np.int64), self.coeffs.shape[0] - 1)
+        return idx, 2.0*(t - idx) - 1.0
+
+    @staticmethod
+    def _clenshaw(c, x):
+        """Evaluate the (N, 3, n) Chebyshev series c at the N values x"""
+        x2 = 2.0*x[:, None]
+        b0 = np.zeros(c.shape[:2])
+        b1 = np.zeros(c.shape[:2])
+        for k in range(c.shape[2] - 1, 0, -1):
+            b0, b1 = c[:, :, k] + x2*b0 - b1, b0
+        return c[:, :, 0] + x[:, None]*b0 - b1
+
+    def position(self, jd):
+        """Return rectangular ecliptic coordinates.
+
+        Arguments:
+          - `jd` : Julian Day in dynamical time, scalar or array
+
+        Returns:
+          - array of shape (3,) + shape of `jd` with x, y and z, in au
+            (km for the Moon)
+
+        """
+        shape = np.shape(jd)
+        jd = np.atleast_1d(jd).ravel()
+        idx, x = self._locate(jd)
+        return self._clenshaw(self.coeffs[idx], x).T.reshape((3,) + shape)
+
+    def velocity(self, jd):
+        """Return the time derivative of position().
+
+        Arguments:
+          - `jd` : Julian Day in dynamical time, scalar or array
+
+        Returns:
+          - array of shape (3,) + shape of `jd`, in au (km for the Moon) per
+            day
+
+        """
+        shape = np.shape(jd)
+        jd = np.atleast_1d(jd).ravel()
+        idx, x = self._locate(jd)
+        return self._clenshaw(self.rates[idx], x).T.reshape((3,) + shape)
+
+    def dimension3(self, jd):
+        """Return ecliptic longitude, latitude and radius.
+
+        Arguments:
+          - `jd` : Julian Day in dynamical time
+
+        Returns:
+          - longitude in radians
+          - latitude in radians
+          - radius in au (km for the Moon)
+
+        """
+        x, y, z = self.position(jd)
+        rho = np.hypot(x, y)
+        return (_scalar_if_one(modpi2(np.arctan2(y, x))),
+                _scalar_if_one(np.arctan2(z, rho)),
+                _scalar_if_one(np.hypot(rho, z)))
+
+    def save(self, path):
+        """Write the ephemeris to a .npz file, see load().
+
+        Arguments:
+          - `path` : name of the file
+
+        Returns:
+          - nothing
+
+        """
+        np.savez(path, body=self.body, jd_start=self.jd_start,
+                 seg_days=self.seg_days, coeffs=self.coeffs)
@@ -27,7 +27,7 @@
 Don't change these unless you are moving to a new universe.
 
 """
-from astronomia.util import d_to_r
+from astronomia.util import d_to_r, compile_polynomial
 
 #
 # Constant terms.
@@ -61,3 +61,13 @@ ko = (d_to_r(125.0445479),
       d_to_r(0.0020754),
       d_to_r(1.0/467441.0),
       d_to_r(1.0/60616000.0))
+
+#
+# The terms above compiled into polynomials of Julian centuries.
+#
+pL1 = compile_polynomial(kL1)
+pD = compile_polynomial(kD)
+pM = compile_polynomial(kM)
+pM1 = compile_polynomial(kM1)
+pF = compile_polynomial(kF)
+po = compile_polynomial(ko)
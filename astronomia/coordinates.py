@@ -26,7 +26,7 @@
 
 import numpy as np
 
-import astronomia.globals
+from astronomia.observer import Observer
 from astronomia.util import modpi2
 
 
@@ -59,7 +59,7 @@ def ecl_to_equ(longitude, latitude, obliquity):
     return ra, dec
 
 
-def equ_to_horiz(H, decl):
+def equ_to_horiz(H, decl, observer=None):
     """Convert equitorial to horizontal coordinates.
 
     [Meeus-1998: equations 13.5, 13.6]
@@ -72,14 +72,20 @@ def equ_to_horiz(H, decl):
       - `H` : hour angle in radians
       - `decl` : declination in radians
 
+    Keywords:
+      - `observer` : (Observer, default=None) the latitude of the observer
+        is used, Observer.from_globals() when None
+
     Returns:
       - azimuth in radians
       - altitude in radians
 
     """
+    if observer is None:
+        observer = Observer.from_globals()
     cosH = np.cos(H)
-    sinLat = np.sin(astronomia.globals.latitude)
-    cosLat = np.cos(astronomia.globals.latitude)
+    sinLat = np.sin(observer.latitude)
+    cosLat = np.cos(observer.latitude)
     A = np.arctan2(np.sin(H), cosH * sinLat - np.tan(decl) * cosLat)
     h = np.arcsin(sinLat * np.sin(decl) + cosLat * np.cos(decl) * cosH)
     return A, h
@@ -144,3 +150,222 @@ def equ_to_ecl(ra, dec, obliquity):
     latitude = modpi2(np.arcsin(np.sin(dec) * cose -
                       np.cos(dec) * sine * sina))
     return longitude, latitude
+
+
+#
+# Rotation matrix pipeline
+#
+# The functions below build 3x3 matrices, or stacks of them with shape
+# (..., 3, 3) when given arrays of epochs, that take unit vectors from one
+# frame to the next. A chain of frames is composed once per epoch with
+# np.matmul and applied to any number of positions with apply_matrix(),
+# which is much cheaper than repeating the spherical trigonometry of the
+# functions above for every position.
+#
+# Frames, x axis first:
+#
+#   - ecliptic      : (cos(b)cos(l), cos(b)sin(l), sin(b))
+#   - equatorial    : (cos(dec)cos(ra), cos(dec)sin(ra), sin(dec))
+#   - hour angle    : (cos(dec)cos(H), cos(dec)sin(H), sin(dec)), H growing
+#                     westward
+#   - horizontal    : (cos(h)cos(A), cos(h)sin(A), sin(h)), azimuth A
+#                     measured westward from the south as in equ_to_horiz()
+#
+
+
+def _matrix(rows):
+    """Stack nine broadcastable components into a (..., 3, 3) array"""
+    rows = np.broadcast_arrays(*[np.asarray(x, dtype=np.float64)
+                                 for row in rows for x in row])
+    return np.stack(rows, axis=-1).reshape(rows[0].shape + (3, 3))
+
+
+def _rot_x(angle):
+    """Matrix rotating vectors by `angle` radians about the x axis"""
+    c = np.cos(angle)
+    s = np.sin(angle)
+    return _matrix(((1.0, 0.0, 0.0),
+                    (0.0, c, -s),
+                    (0.0, s, c)))
+
+
+def _rot_z(angle):
+    """Matrix rotating vectors by `angle` radians about the z axis"""
+    c = np.cos(angle)
+    s = np.sin(angle)
+    return _matrix(((c, -s, 0.0),
+                    (s, c, 0.0),
+                    (0.0, 0.0, 1.0)))
+
+
+def spherical_to_unit(longitude, latitude):
+    """Convert spherical coordinates to unit vectors.
+
+    Arguments:
+      - `longitude` : longitude (or right accension, hour angle, azimuth) in
+        radians
+      - `latitude` : latitude (or declination, altitude) in radians
+
+    Returns:
+      - array of shape (..., 3)
+
+    """
+    cosb = np.cos(latitude)
+    return np.stack(np.broadcast_arrays(cosb * np.cos(longitude),
+                                        cosb * np.sin(longitude),
+                                        np.sin(latitude)), axis=-1)
+
+
+def unit_to_spherical(vectors):
+    """Convert vectors to spherical coordinates.
+
+    Arguments:
+      - `vectors` : array of shape (..., 3)
+
+    Returns:
+      - longitude in radians, in the range 0..2pi
+      - latitude in radians
+
+    """
+    x = vectors[..., 0]
+    y = vectors[..., 1]
+    z = vectors[..., 2]
+    return modpi2(np.arctan2(y, x)), np.arctan2(z, np.hypot(x, y))
+
+
+def apply_matrix(matrix, vectors):
+    """Transform vectors with one matrix per epoch.
+
+    Arguments:
+      - `matrix` : (3, 3) matrix, or (M, 3, 3) stack for M epochs
+      - `vectors` : (N, 3) array of vectors
+
+    Returns:
+      - (N, 3) array, or (M, N, 3) for a stack of matrices
+
+    """
+    return np.matmul(vectors, np.swapaxes(matrix, -1, -2))
+
+
+def ecl_to_equ_matrix(obliquity):
+    """Return the matrix from ecliptic to equatorial coordinates.
+
+    Arguments:
+      - `obliquity` : obliquity of the ecliptic in radians
+
+    Returns:
+      - rotation matrix
+
+    """
+    return _rot_x(obliquity)
+
+
+def equ_to_ecl_matrix(obliquity):
+    """Return the matrix from equatorial to ecliptic coordinates.
+
+    Arguments:
+      - `obliquity` : obliquity of the ecliptic in radians
+
+    Returns:
+      - rotation matrix
+
+    """
+    return _rot_x(-obliquity)
+
+
+def nutation_matrix(deltaPsi):
+    """Return the matrix applying the nutation in longitude to ecliptic
+    coordinates.
+
+    Arguments:
+      - `deltaPsi` : nutation in longitude, in radians
+
+    Returns:
+      - rotation matrix
+
+    """
+    return _rot_z(deltaPsi)
+
+
+def fk5_matrix(jd):
+    """Return the matrix converting VSOP ecliptic coordinates to FK5.
+
+    This is the rotation behind the corrections of
+    astronomia.planets.vsop_to_fk5() [Meeus-1998: pg 219]: a small rotation
+    about axes turned by -1.397 degrees per century from the equinox of date.
+
+    Arguments:
+      - `jd` : Julian Day in dynamical time
+
+    Returns:
+      - rotation matrix
+
+    """
+    from astronomia.calendar import jd_to_jcent
+    from astronomia.planets import _k0, _k1, _k2, _k3
+
+    T = jd_to_jcent(jd)
+    turn = (_k0 + _k1*T)*T
+    small = _matrix(((1.0, -_k2, -_k3),
+                     (_k2, 1.0, _k3),
+                     (_k3, -_k3, 1.0)))
+    return np.matmul(_rot_z(-turn), np.matmul(small, _rot_z(turn)))
+
+
+def equ_to_hour_angle_matrix(theta):
+    """Return the matrix from equatorial to hour angle coordinates.
+
+    Arguments:
+      - `theta` : local sidereal time in radians, i.e. the sidereal time at
+        Greenwich minus the observer's longitude (positive west)
+
+    Returns:
+      - matrix (a reflection, since hour angles grow westward)
+
+    """
+    c = np.cos(theta)
+    s = np.sin(theta)
+    return _matrix(((c, s, 0.0),
+                    (s, -c, 0.0),
+                    (0.0, 0.0, 1.0)))
+
+
+def hour_angle_to_horiz_matrix(latitude):
+    """Return the matrix from hour angle to horizontal coordinates.
+
+    Arguments:
+      - `latitude` : observer's latitude in radians
+
+    Returns:
+      - rotation matrix
+
+    """
+    c = np.cos(latitude)
+    s = np.sin(latitude)
+    return _matrix(((s, 0.0, -c),
+                    (0.0, 1.0, 0.0),
+                    (c, 0.0, s)))
+
+
+def ecl_to_horiz_matrix(jd, deltaPsi, epsilon, theta0, latitude, longitude):
+    """Return the full chain from VSOP ecliptic to horizontal coordinates.
+
+    The chain is FK5 correction, nutation in longitude, ecliptic to
+    equatorial with the true obliquity, sidereal rotation and observer.
+
+    Arguments:
+      - `jd`        : Julian Day in dynamical time
+      - `deltaPsi`  : nutation in longitude, in radians
+      - `epsilon`   : true obliquity (corrected for nutation), in radians
+      - `theta0`    : sidereal time at Greenwich, in radians
+      - `latitude`  : observer's latitude in radians
+      - `longitude` : observer's longitude in radians, positive west
+
+    Returns:
+      - rotation matrix, or stack of them for arrays of epochs
+
+    """
+    M = np.matmul(nutation_matrix(deltaPsi), fk5_matrix(jd))
+    M = np.matmul(ecl_to_equ_matrix(epsilon), M)
+    M = np.matmul(equ_to_hour_angle_matrix(theta0 - longitude), M)
+    return np.matmul(hour_angle_to_horiz_matrix(latitude), M)
@@ -29,10 +29,11 @@ Reference: Jean Meeus, _Astronomical Algorithms_, second edition, 1998,
 Willmann-Bell, Inc.
 
 """
-from bisect import bisect
+import numpy as np
+
 from astronomia.calendar import jd_to_cal
 from astronomia.constants import seconds_per_day
-from astronomia.util import polynomial
+from astronomia.util import compile_polynomial, _scalar_if_one
 
 # _tbl is a list of tuples (jd, seconds), giving deltaT values for the
 # beginnings of years in a historical range. [Meeus-1998: table 10.A]
@@ -1202,6 +1203,89 @@ _tbl = [
 _tbl_start = 1620
 _tbl_end = 2015
 
+# the table as arrays for np.interp
+_tbl_jd = np.array([jd for jd, secs in _tbl], dtype=np.float64)
+_tbl_secs = np.array([secs for jd, secs in _tbl], dtype=np.float64)
+
+#
+# I decided to replicate Naughter for times outside of table.
+# Naughter claims that this is better since there are
+# no discontinuties.
+# Found Naughter source NASA Eclipse Web site,
+# 'Polynomial Expressions for Delta T'.  Adapted from
+# 'Five Millennium Canon of Solar Eclipses'
+#
+# Some of these eras will not be used because
+# first will interpolate from values in _tbl.
+# Decided to keep for completeness.
+#
+# Each era is (first year after the era, origin year, coefficients), the
+# polynomial being in centuries from the origin year.
+#
+_eras = (
+    (-500, 1820, (-20, 0, 32)),
+    (500, 0, (10583.6,
+              -1014.41,
+              33.78311,
+              -5.952053,
+              -0.1798452,
+              0.022174192,
+              0.0090316521)),
+    (1600, 1000, (1574.2,
+                  -556.01,
+                  71.23472,
+                  0.319781,
+                  -0.8503463,
+                  -0.005050998,
+                  0.0083572073)),
+    (1700, 1600, (120, -98.08, -153.2, 1/0.007129)),
+    (1800, 1700, (8.83, 16.03, -59.285, 133.36, -1/0.01174)),
+    (1860, 1800, (13.72,
+                  -33.2447,
+                  68.612,
+                  4111.6,
+                  -37436,
+                  121272,
+                  -169900,
+                  87500)),
+    (1900, 1860, (7.62,
+                  57.37,
+                  -2517.54,
+                  16806.68,
+                  -44736.24,
+                  1/0.0000233174)),
+    (1920, 1900, (-2.79, 149.4119, -598.939, 6196.6, -19700)),
+    (1941, 1920, (21.20, 84.493, -761.00, 2093.6)),
+    (1961, 1950, (29.07, 40.7, -1/0.0233, 1/0.002547)),
+    (1986, 1975, (45.45, 106.7, -1/0.026, -1/0.000718)),
+    (2005, 2000, (63.86,
+                  33.45,
+                  -603.74,
+                  1727.5,
+                  65181.4,
+                  237359.9)),
+    (2050, 2000, (62.92, 32.217, 55.89)))
+
+
+def _era_polynomial(origin, coefficients):
+    """Return the deltaT formula of an era as a function of the year"""
+    centuries = compile_polynomial(coefficients)
+
+    def formula(y):
+        return centuries((y - origin)/100.0)
+    return formula
+
+
+def _bridge_2150(y):
+    """Return deltaT between 2050 and 2150"""
+    t = (y - 1820)/100.0
+    return -20.0 + 32.0*(t)**2 - 0.5628*(2150 - y)
+
+_era_bounds = np.array([era[0] for era in _eras] + [2150])
+_era_formulas = [_era_polynomial(origin, coefficients)
+                 for bound, origin, coefficients in _eras] + \
+    [_bridge_2150, _era_polynomial(1820, (-20.0, 0.0, 32.0))]
+
 
 def deltaT_seconds(jd):
     """Return deltaT as seconds of time.
@@ -1210,123 +1294,48 @@ def deltaT_seconds(jd):
     table of observed values. Outside that range we use formulae.
 
     Arguments:
-      - `jd` : (int) Julian Day number
+      - `jd` : Julian Day number, scalar or array
 
     Returns:
-      - deltaT in seconds
+      - deltaT in seconds, with the shape of `jd`
 
     """
+    shape = np.shape(jd)
+    jd = np.atleast_1d(np.asarray(jd, dtype=np.float64)).ravel()
     yr, mo, day = jd_to_cal(jd)
-    #
-    # 1620 - 20xx
-    #
-    if _tbl_start < yr < _tbl_end:
-        idx = bisect(_tbl, (jd, 0))
-        try:
-            jd1, secs1 = _tbl[idx]
-            jd0, secs0 = _tbl[idx-1]
-            # simple linear interpolation between two values
-            return ((jd - jd0) * (secs1 - secs0) / (jd1 - jd0)) + secs0
-        except IndexError:
-            pass
-
-    # I decided to replicate Naughter for times outside of table.
-    # Naughter claims that this is better since there are
-    # no discontinuties.
-    # Found Naughter source NASA Eclipse Web site,
-    # 'Polynomial Expressions for Delta T'.  Adapted from
-    # 'Five Millennium Canon of Solar Eclipses'
+    yr = np.atleast_1d(yr)
+    mo = np.atleast_1d(mo)
 
-    # Some of these if blocks will not be used because
-    # first will interpolate from values in _tbl.
-    # Decided to keep for completeness.
+    result = np.empty(jd.shape)
 
-    # Wants middle of month... accurate enough?
-    y = yr + (mo - 0.5)/12
-    if (yr < -500):
-        t = (y - 1820)/100.0
-        result = polynomial([-20, 0, 32], t)
-    elif (yr < 500):
-        t = y/100.0
-        result = polynomial([10583.6,
-                             -1014.41,
-                             33.78311,
-                             -5.952053,
-                             -0.1798452,
-                             0.022174192,
-                             0.0090316521], t)
-    elif (yr < 1600):
-        t = (y - 1000)/100.0
-        result = polynomial([1574.2,
-                             -556.01,
-                             71.23472,
-                             0.319781,
-                             -0.8503463,
-                             -0.005050998,
-                             0.0083572073], t)
-    elif (yr < 1700):
-        t = (y - 1600)/100.0
-        result = polynomial([120, -98.08, -153.2, 1/0.007129], t)
-    elif (yr < 1800):
-        t = (y - 1700)/100.0
-        result = polynomial([8.83, 16.03, -59.285, 133.36, -1/0.01174], t)
-    elif (yr < 1860):
-        t = (y - 1800)/100.0
-        result = polynomial([13.72,
-                             -33.2447,
-                             68.612,
-                             4111.6,
-                             -37436,
-                             121272,
-                             -169900,
-                             87500], t)
-    elif (yr < 1900):
-        t = (y - 1860)/100.0
-        result = polynomial([7.62,
-                             57.37,
-                             -2517.54,
-                             16806.68,
-                             -44736.24,
-                             1/0.0000233174], t)
-    elif (yr < 1920):
-        t = (y - 1900)/100.0
-        result = polynomial([-2.79, 149.4119, -598.939, 6196.6, -19700], t)
-    elif (yr < 1941):
-        t = (y - 1920)/100.0
-        result = polynomial([21.20, 84.493, -761.00, 2093.6], t)
-    elif (yr < 1961):
-        t = (y - 1950)/100.0
-        result = polynomial([29.07, 40.7, -1/0.0233, 1/0.002547], t)
-    elif (yr < 1986):
-        t = (y - 1975)/100.0
-        result = polynomial([45.45, 106.7, -1/0.026, -1/0.000718], t)
-    elif (yr < 2005):
-        t = (y - 2000)/100.0
-        result = polynomial([63.86,
-                             33.45,
-                             -603.74,
-                             1727.5,
-                             65181.4,
-                             237359.9], t)
-    elif (yr < 2050):
-        t = (y - 2000)/100.0
-        result = polynomial([62.92, 32.217, 55.89], t)
-    elif (yr < 2150):
-        t = (y - 1820)/100.0
-        result = -20.0 + 32.0*(t)**2 - 0.5628*(2150 - y)
-    else:
-        t = (y - 1820)/100.0
-        result = polynomial([-20.0, 0.0, 32.0], t)
+    #
+    # 1620 - 20xx, simple linear interpolation between two values
+    #
+    table = (yr > _tbl_start) & (yr < _tbl_end) & (jd <= _tbl_jd[-1])
+    result[table] = np.interp(jd[table], _tbl_jd, _tbl_secs)
 
-    result = result + (-0.000012932*(y - 1955)**2)
-    return result
+    #
+    # Elsewhere, the formula of the era of each date. Only the eras
+    # actually present are evaluated.
+    #
+    outside = ~table
+    if outside.any():
+        # Wants middle of month... accurate enough?
+        y = yr[outside] + (mo[outside] - 0.5)/12
+        era = np.searchsorted(_era_bounds, yr[outside], side="right")
+        values = np.empty(y.shape)
+        for i in np.unique(era):
+            select = era == i
+            values[select] = _era_formulas[i](y[select])
+        result[outside] = values + (-0.000012932*(y - 1955)**2)
+    return _scalar_if_one(result.reshape(shape))
 
 
 def dt_to_ut(jd):
     """Convert Julian Day from dynamical to universal time.
 
     Arguments:
-      - `jd` : (int) Julian Day number (dynamical time)
+      - `jd` : (int) Julian Day number (dynamical time), scalar or array
 
     Returns:
       - Julian Day number : (int) (universal time)
@@ -24,12 +24,15 @@
     Calculate the times of solstice and equinox events for Earth
     """
 
-from math import pi, cos
+from math import pi
+
+import numpy as np
+
 from astronomia.calendar import jd_to_jcent
 from astronomia.constants import pi2
-from astronomia.nutation import nutation_in_longitude
+from astronomia.nutation import nutation
 from astronomia.sun import aberration_low, Sun
-from astronomia.util import d_to_r, polynomial, diff_angle
+from astronomia.util import d_to_r, diff_angle, _scalar_if_one
 from astronomia.planets import vsop_to_fk5
 import astronomia.globals
 
@@ -56,6 +59,15 @@ _approx_3000 = {
     "autumn": (2451810.21715, 365242.01767, -0.11575,  0.00337,  0.00078),
     "winter": (2451900.05952, 365242.74049, -0.06223, -0.00823,  0.00032)}
 
+#
+# The same tables as arrays, one row per season in the order of
+# astronomia.globals.season_names
+#
+_capprox_1000 = np.array([_approx_1000[season]
+                          for season in astronomia.globals.season_names])
+_capprox_3000 = np.array([_approx_3000[season]
+                          for season in astronomia.globals.season_names])
+
 #
 # Meeus-1998 Table 27.C
 #
@@ -84,6 +96,23 @@ _terms = [
     (12, d_to_r(320.81),  d_to_r(34777.259)),
     (9, d_to_r(227.73),  d_to_r(1222.114)),
     (8, d_to_r(15.45),  d_to_r(16859.074))]
+_tA, _tB, _tC = (np.array(column) for column in zip(*_terms))
+
+
+def _season_index(season):
+    """Return the indices in astronomia.globals.season_names of season
+    names, scalar or array.
+    """
+    season = np.asarray(season)
+    index = np.zeros(season.shape, dtype=np.int64)
+    known = np.zeros(season.shape, dtype=bool)
+    for i, name in enumerate(astronomia.globals.season_names):
+        mask = season == name
+        index[mask] = i
+        known |= mask
+    if not known.all():
+        raise Error("unknown season =" + str(season[~known][0]))
+    return index
 
 
 def equinox_approx(yr, season):
@@ -93,40 +122,49 @@ def equinox_approx(yr, season):
     the error from the precise instant is at most 2.16 minutes.
 
     Arguments:
-      - `yr`     : (int) year
-      - `season` : (str) {"spring", "summer", "autumn", "winter"}
+      - `yr`     : (int) year, scalar or array
+      - `season` : (str) {"spring", "summer", "autumn", "winter"}, or an
+        array of them broadcasting with `yr`
 
     Returns:
-      - Julian Day : (int) in dynamical time
+      - Julian Day : (float) in dynamical time, scalar or array with the
+        broadcast shape of the arguments
 
     """
-    if not (-1000 <= yr <= 3000):
+    yr = np.asarray(yr, dtype=np.float64)
+    if np.any(yr < -1000) or np.any(yr > 3000):
         raise Error("year is out of range")
-    if season not in astronomia.globals.season_names:
-        raise Error("unknown season =" + season)
-
-    yr = int(yr)
-    if -1000 <= yr <= 1000:
-        Y = yr / 1000.0
-        tbl = _approx_1000
-    else:
-        Y = (yr - 2000) / 1000.0
-        tbl = _approx_3000
-
-    jd = polynomial(tbl[season], Y)
+    index = _season_index(season)
+
+    yr, index = np.broadcast_arrays(np.trunc(yr), index)
+    shape = yr.shape
+    yr, index = yr.ravel(), index.ravel()
+    early = yr <= 1000
+    Y = np.where(early, yr / 1000.0, (yr - 2000) / 1000.0)
+    coeffs = np.where(early[:, None], _capprox_1000[index],
+                      _capprox_3000[index])
+
+    # Horner's rule with the coefficients of each event
+    jd = coeffs[:, 4].copy()
+    for k in range(3, -1, -1):
+        jd *= Y
+        jd += coeffs[:, k]
     T = jd_to_jcent(jd)
     W = d_to_r(35999.373 * T - 2.47)
-    delta_lambda = 1 + 0.0334 * cos(W) + 0.0007 * cos(2 * W)
+    delta_lambda = 1 + 0.0334 * np.cos(W) + 0.0007 * np.cos(2 * W)
 
-    jd += 0.00001*sum([A*cos(B + C*T) for A, B, C in _terms]) / delta_lambda
+    S = np.dot(_tA, np.cos(_tB[:, None] + _tC[:, None]*T))
+    jd += 0.00001 * S / delta_lambda
 
-    return jd
+    return _scalar_if_one(jd.reshape(shape))
 
 _circle = {
     "spring": 0.0,
     "summer": pi * 0.5,
     "autumn": pi,
     "winter": pi * 1.5}
+_acircle = np.array([_circle[season]
+                     for season in astronomia.globals.season_names])
 
 _k_sun_motion = 365.25 / pi2
 
@@ -134,30 +172,70 @@ _k_sun_motion = 365.25 / pi2
 def equinox(jd, season, delta):
     """Return the precise moment of an equinox or solstice event on Earth.
 
+    All the events of an array are iterated together; an event drops out of
+    the iteration as soon as it has converged.
+
     Parameters:
-      - `jd`     : Julian of an approximate time of the event in dynamical time
-      - `season` : one of ("spring", "summer", "autumn", "winter")
+      - `jd`     : Julian of an approximate time of the event in dynamical
+        time, scalar or array
+      - `season` : one of ("spring", "summer", "autumn", "winter"), or an
+        array of them broadcasting with `jd`
       - `delta`  : the required precision in days. Times accurate to a second
         are reasonable when using the VSOP model.
 
     Returns:
-      - Julian Day : (int) dynamical time
+      - Julian Day : (float) dynamical time, scalar or array with the
+        broadcast shape of the arguments
 
     """
     #
     # If we knew that the starting approximate time was close enough
-    # to the actual time, we could pull nutation_in_longitude() and the
+    # to the actual time, we could pull nutation() and the
     # aberration out of the loop and save some calculating.
     #
-    circ = _circle[season]
+    jd, index = np.broadcast_arrays(np.asarray(jd, dtype=np.float64),
+                                    _season_index(season))
+    shape = jd.shape
+    jd = jd.ravel().copy()
+    circ = _acircle[index.ravel()]
     sun = Sun()
+    todo = np.arange(jd.size)
     for i in range(20):
-        jd0 = jd
-        L, B, R = sun.dimension3(jd)
-        L += nutation_in_longitude(jd) + aberration_low(R)
-        L, B = vsop_to_fk5(jd, L, B)
+        t = jd[todo]
+        L, B, R = sun.dimension3(t)
+        L = L + nutation(t)[0] + aberration_low(R)
+        L, B = vsop_to_fk5(t, L, B)
         # Meeus uses jd + 58 * sin(diff(...))
-        jd += diff_angle(L, circ) * _k_sun_motion
-        if abs(jd - jd0) < delta:
-            return jd
+        step = diff_angle(L, circ[todo]) * _k_sun_motion
+        jd[todo] = t + step
+        todo = todo[np.abs(step) >= delta]
+        if not todo.size:
+            return _scalar_if_one(jd.reshape(shape))
     raise Error("bailout")
+
+
+def equinoxes(years, seasons=None, delta=1.0/86400):
+    """Return the precise moments of equinox and solstice events for
+    ranges of years.
+
+    The events start from equinox_approx() and are refined together by
+    equinox().
+
+    Arguments:
+      - `years` : (int) years, scalar or array, in the range -1000...3000
+
+    Keywords:
+      - `seasons` : (default=None) one of ("spring", "summer", "autumn",
+        "winter"), or an array of them broadcasting with `years`. When None,
+        the four seasons in this order along a new last axis.
+      - `delta`   : (float, default=1/86400) the required precision in days
+
+    Returns:
+      - Julian Days : (float) dynamical time, array with the broadcast shape
+        of the arguments
+
+    """
+    if seasons is None:
+        years = np.asarray(years)[..., None]
+        seasons = np.array(astronomia.globals.season_names)
+    return equinox(equinox_approx(years, seasons), seasons, delta)
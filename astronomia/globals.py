@@ -27,6 +27,9 @@
 These can be set directly, or there is a routine astronomia.util.load_params()
 which will assign them based on values in a parameter text file.
 
+The observer values are only defaults: the functions which use them also
+take an astronomia.observer.Observer.
+
 """
 
 #
@@ -72,6 +75,14 @@ longitude = 0.0
 #
 latitude = 0.0
 
+#
+# Path of the binary VSOP87d database written by
+# astronomia.planets.write_vsop87d_binary_db(). When set to an existing file
+# the tables are memory-mapped from it instead of being imported from the
+# text database in astronomia.vsop87d_dict.
+#
+vsop87d_binary_path = None
+
 #
 # Month names. There must be twelve. The default is three-character
 # abbreviations so that listings line up.
@@ -94,3 +105,8 @@ month_names = ("jan",
 # equinoxes and solstices.
 #
 season_names = ("spring", "summer", "autumn", "winter")
+
+#
+# Moon phase names, in the order of lunar.moon_phases() phase numbers.
+#
+phase_names = ("new", "first quarter", "full", "last quarter")
@@ -34,8 +34,9 @@ second edition, 1998, Willmann-Bell, Inc.
 import numpy as np
 
 from astronomia.calendar import jd_to_jcent
-from astronomia.util import polynomial, d_to_r, modpi2
-from astronomia.commonterms import kL1, kD, kM, kM1, kF, ko
+from astronomia.util import compile_polynomial, d_to_r, modpi2, \
+    diff_angle, _scalar_if_one
+from astronomia.commonterms import pL1, pD, pM, pM1, pF, po
 
 
 class Error(Exception):
@@ -174,29 +175,117 @@ _tblB = (
     (4, -1,  0, -1,     115),
     (2, -2,  0,  1,     107))
 
-_kA1 = (d_to_r(119.75), d_to_r(131.849))
-_kA2 = (d_to_r(53.09), d_to_r(479264.290))
-_kA3 = (d_to_r(313.45), d_to_r(481266.484))
+#
+# The tables in matrix form: one row per term with the multipliers of
+# D, M, M1 and F, the power of E applied to the amplitude (the absolute
+# value of the multiplier of M) and the amplitudes.
+#
+_mLR = np.array([t[:4] for t in _tblLR], dtype=np.float64)
+_eLR = np.abs(np.array([t[1] for t in _tblLR]))
+_aL = np.array([t[4] for t in _tblLR], dtype=np.float64)
+_aR = np.array([t[5] for t in _tblLR], dtype=np.float64)
+
+_mB = np.array([t[:4] for t in _tblB], dtype=np.float64)
+_eB = np.abs(np.array([t[1] for t in _tblB]))
+_aB = np.array([t[4] for t in _tblB], dtype=np.float64)
+
+_pA1 = compile_polynomial((d_to_r(119.75), d_to_r(131.849)))
+_pA2 = compile_polynomial((d_to_r(53.09), d_to_r(479264.290)))
+_pA3 = compile_polynomial((d_to_r(313.45), d_to_r(481266.484)))
+_pE = compile_polynomial((1.0, -0.002516, -0.0000074))
+_pPerigee = compile_polynomial((d_to_r(83.3532465),
+                                d_to_r(4069.0137287),
+                                d_to_r(-0.0103200),
+                                d_to_r(-1./80053),
+                                d_to_r(1./18999000)))
 
 
 def _constants(T):
     """Calculate values required by several other functions"""
-    L1 = modpi2(polynomial(kL1, T))
-    D = modpi2(polynomial(kD, T))
-    M = modpi2(polynomial(kM, T))
-    M1 = modpi2(polynomial(kM1, T))
-    F = modpi2(polynomial(kF, T))
+    L1 = modpi2(pL1(T))
+    D = modpi2(pD(T))
+    M = modpi2(pM(T))
+    M1 = modpi2(pM1(T))
+    F = modpi2(pF(T))
 
-    A1 = modpi2(polynomial(_kA1, T))
-    A2 = modpi2(polynomial(_kA2, T))
-    A3 = modpi2(polynomial(_kA3, T))
+    A1 = modpi2(_pA1(T))
+    A2 = modpi2(_pA2(T))
+    A3 = modpi2(_pA3(T))
 
-    E = polynomial([1.0, -0.002516, -0.0000074], T)
+    E = _pE(T)
     E2 = E*E
 
     return L1, D, M, M1, F, A1, A2, A3, E, E2
 
 
+def _epochs(jd):
+    """Return the shape of `jd` and the Julian centuries since J2000.0, as a
+    scalar for a single epoch or as a 1-D array.
+    """
+    T = jd_to_jcent(jd)
+    if np.ndim(T):
+        T = T.ravel()
+    return np.shape(jd), T
+
+
+def _series_args(T):
+    """Return the constants for one or more epochs, plus the arguments and
+    eccentricity factors needed to evaluate the tables.
+
+    Arguments:
+      - `T` : Julian centuries since J2000.0, scalar or 1-D array
+
+    Returns:
+      - the values of _constants(T)
+      - (4,) or (4, N) array of D, M, M1 and F
+      - (3,) or (3, N) array of 1, E and E*E, to be indexed by the power of
+        E of each term
+
+    """
+    L1, D, M, M1, F, A1, A2, A3, E, E2 = _constants(T)
+    args = np.array([D, M, M1, F])
+    efac = np.array([np.ones_like(E), E, E2])
+    return (L1, D, M, M1, F, A1, A2, A3, E, E2), args, efac
+
+
+def _longitude_sum(constants, terms):
+    """Return the longitude without nutation, in radians.
+
+    Arguments:
+      - `constants` : values of _constants(T)
+      - `terms`     : E factors times the sine of the arguments of table
+        47.A
+
+    """
+    L1, D, M, M1, F, A1, A2, A3, E, E2 = constants
+    lsum = np.dot(_aL, terms)
+    lsum += 3958*np.sin(A1) + 1962*np.sin(L1 - F) + 318*np.sin(A2)
+    return L1 + d_to_r(lsum / 1000000)
+
+
+def _latitude_sum(constants, args, efac):
+    """Return the latitude in radians from the values of _series_args()"""
+    L1, D, M, M1, F, A1, A2, A3, E, E2 = constants
+    bsum = np.dot(_aB, efac[_eB]*np.sin(np.dot(_mB, args)))
+    bsum += -2235 * np.sin(L1) +    \
+        382 * np.sin(A3) +      \
+        175 * np.sin(A1 - F) +  \
+        175 * np.sin(A1 + F) +  \
+        127 * np.sin(L1 - M1) - \
+        115 * np.sin(L1 + M1)
+    return d_to_r(bsum / 1000000)
+
+
+def _radius_sum(terms):
+    """Return the radius in km.
+
+    Arguments:
+      - `terms` : E factors times the cosine of the arguments of table 47.A
+
+    """
+    return 385000.56 + np.dot(_aR, terms) / 1000
+
+
 class Lunar:
     """ELP2000 lunar position calculations"""
 
@@ -235,7 +324,7 @@ class Lunar:
           - mean longitude of ascending node
         """
         T = jd_to_jcent(jd)
-        return modpi2(polynomial(ko, T))
+        return modpi2(po(T))
 
     def mean_longitude_perigee(self, jd):
         """Return mean longitude of lunar perigee
@@ -248,14 +337,7 @@ class Lunar:
 
         """
         T = jd_to_jcent(jd)
-        X = polynomial(
-            (d_to_r(83.3532465),
-             d_to_r(4069.0137287),
-             d_to_r(-0.0103200),
-             d_to_r(-1./80053),
-             d_to_r(1./18999000)
-             ), T)
-        return modpi2(X)
+        return modpi2(_pPerigee(T))
 
     def mean_longitude(self, jd):
         """Return geocentric mean longitude.
@@ -268,7 +350,7 @@ class Lunar:
 
         """
         T = jd_to_jcent(jd)
-        return modpi2(polynomial(kL1, T))
+        return modpi2(pL1(T))
 
     def mean_elongation(self, jd):
         """Return geocentric mean elongation.
@@ -281,7 +363,7 @@ class Lunar:
 
         """
         T = jd_to_jcent(jd)
-        return modpi2(polynomial(kD, T))
+        return modpi2(pD(T))
 
     def mean_anomaly(self, jd):
         """Return geocentric mean anomaly.
@@ -294,7 +376,7 @@ class Lunar:
 
         """
         T = jd_to_jcent(jd)
-        return modpi2(polynomial(kM1, T))
+        return modpi2(pM1(T))
 
     def argument_of_latitude(self, jd):
         """Return geocentric mean longitude.
@@ -307,24 +389,44 @@ class Lunar:
 
         """
         T = jd_to_jcent(jd)
-        return modpi2(polynomial(kF, T))
+        return modpi2(pF(T))
 
-    def dimension3(self, jd):
+    def dimension3(self, jd, deltaPsi=None):
         """Return geocentric ecliptic longitude, latitude and radius.
 
         When we need all three dimensions it is more efficient to combine the
-        calculations in one routine.
+        calculations in one routine: the fundamental arguments are computed
+        once and longitude and radius share the arguments of table 47.A.
 
         Arguments:
           - `jd` : Julian Day in dynamical time
 
+        Keywords:
+          - `deltaPsi` : (default=None) nutation in longitude in radians, if
+            already known for `jd`; computed when None
+
         Returns:
           - longitude in radians
           - latitude in radians
           - radius in km, Earth's center to Moon's center
 
         """
-        return self._longitude(jd), self._latitude(jd), self._radius(jd)
+        shape, T = _epochs(jd)
+        constants, args, efac = _series_args(T)
+
+        phases = np.dot(_mLR, args)
+        weights = efac[_eLR]
+        longitude = _longitude_sum(constants, weights*np.sin(phases))
+        latitude = _latitude_sum(constants, args, efac)
+        radius = _radius_sum(weights*np.cos(phases))
+
+        if deltaPsi is None:
+            from astronomia.nutation import nutation
+            deltaPsi = nutation(jd)[0]
+        longitude = longitude.reshape(shape) + deltaPsi
+        return (_scalar_if_one(longitude),
+                _scalar_if_one(latitude.reshape(shape)),
+                _scalar_if_one(radius.reshape(shape)))
 
     def dimension(self, jd, dim):
         """Return one of geocentric ecliptic longitude, latitude and radius.
@@ -349,64 +451,104 @@ class Lunar:
     def _longitude(self, jd):
         """Return the geocentric ecliptic longitude in radians.
         """
-        from astronomia.nutation import nutation_in_longitude
+        from astronomia.nutation import nutation
 
-        T = jd_to_jcent(jd)
-        L1, D, M, M1, F, A1, A2, A3, E, E2 = _constants(T)
-        lsum = 0.0
-        for tD, tM, tM1, tF, tl, tr in _tblLR:
-            arg = tD * D + tM * M + tM1 * M1 + tF * F
-            if abs(tM) == 1:
-                tl *= E
-            elif abs(tM) == 2:
-                tl *= E2
-            lsum += tl * np.sin(arg)
-
-        lsum += 3958*np.sin(A1) + 1962*np.sin(L1 - F) + 318*np.sin(A2)
-
-        nutinlong = nutation_in_longitude(jd)
-        longitude = L1 + d_to_r(lsum / 1000000) + nutinlong
-        return longitude
+        shape, T = _epochs(jd)
+        constants, args, efac = _series_args(T)
+
+        terms = efac[_eLR]*np.sin(np.dot(_mLR, args))
+        longitude = _longitude_sum(constants, terms)
+        longitude = longitude.reshape(shape) + nutation(jd)[0]
+        return _scalar_if_one(longitude)
 
     def _latitude(self, jd):
         """Return the geocentric ecliptic latitude in radians.
         """
-        T = jd_to_jcent(jd)
-        L1, D, M, M1, F, A1, A2, A3, E, E2 = _constants(T)
-
-        bsum = 0.0
-        for tD, tM, tM1, tF, tb in _tblB:
-            arg = tD * D + tM * M + tM1 * M1 + tF * F
-            if abs(tM) == 1:
-                tb *= E
-            elif abs(tM) == 2:
-                tb *= E2
-            bsum += tb * np.sin(arg)
-
-        bsum += -2235 * np.sin(L1) +    \
-            382 * np.sin(A3) +      \
-            175 * np.sin(A1 - F) +  \
-            175 * np.sin(A1 + F) +  \
-            127 * np.sin(L1 - M1) - \
-            115 * np.sin(L1 + M1)
-
-        latitude = d_to_r(bsum / 1000000)
-        return latitude
+        shape, T = _epochs(jd)
+        constants, args, efac = _series_args(T)
+
+        latitude = _latitude_sum(constants, args, efac)
+        return _scalar_if_one(latitude.reshape(shape))
 
     def _radius(self, jd):
         """Return the geocentric radius in km.
         """
-        T = jd_to_jcent(jd)
-        L1, D, M, M1, F, A1, A2, A3, E, E2 = _constants(T)
-
-        rsum = 0.0
-        for tD, tM, tM1, tF, tl, tr in _tblLR:
-            arg = tD*D + tM*M + tM1*M1 + tF*F
-            if abs(tM) == 1:
-                tr *= E
-            elif abs(tM) == 2:
-                tr *= E2
-            rsum += tr * np.cos(arg)
-
-        dist = 385000.56 + rsum / 1000
-        return dist
+        shape, T = _epochs(jd)
+        constants, args, efac = _series_args(T)
+
+        dist = _radius_sum(efac[_eLR]*np.cos(np.dot(_mLR, args)))
+        return _scalar_if_one(dist.reshape(shape))
+
+
+#
+# Mean length of the synodic month in days [Meeus-1998: pg 349]
+#
+_synodic_month = 29.530588861
+_quarter = np.pi / 2
+
+
+def _elongation(jd):
+    """Return the apparent longitude of the Moon minus that of the Sun, in
+    radians, for an array of Julian Days in dynamical time.
+
+    The nutation in longitude is the same for both and left out.
+    """
+    from astronomia.sun import Sun, aberration_low
+    from astronomia.planets import vsop_to_fk5
+
+    L, B, R = Sun().dimension3(jd)
+    L, B = vsop_to_fk5(jd, L + aberration_low(R), B)
+    return modpi2(Lunar().dimension3(jd, 0.0)[0] - L)
+
+
+def moon_phases(jd_start, jd_end, delta=1.0/86400):
+    """Return the new moons, first quarters, full moons and last quarters
+    within a range of dates.
+
+    The elongation of the Moon from the Sun is sampled every day with the
+    low precision solar longitude, the samples bracket the instants where
+    it crosses a multiple of 90 degrees, and all the brackets are then
+    refined together with the full ELP2000 and VSOP87d models.
+
+    Arguments:
+      - `jd_start` : (float) first Julian Day in dynamical time
+      - `jd_end`   : (float) last Julian Day in dynamical time
+
+    Keywords:
+      - `delta` : (float, default=1/86400) the required precision in days
+
+    Returns:
+      - (N, 2) array of (Julian Day in dynamical time, phase) sorted by
+        time, phase 0 = new moon, 1 = first quarter, 2 = full moon and
+        3 = last quarter, see astronomia.globals.phase_names
+
+    """
+    from astronomia.sun import longitude_radius_low
+
+    if not jd_end > jd_start:
+        raise Error("empty range of dates")
+
+    # a quarter lasts 6.5 days at the least, so one crossing per bracket
+    t = jd_start + np.arange(np.ceil(jd_end - jd_start) + 1.0)
+    E = np.unwrap(Lunar().dimension3(t, 0.0)[0] -
+                  longitude_radius_low(t)[0])
+    k = np.floor(E / _quarter)
+    idx = np.flatnonzero(k[1:] > k[:-1])
+
+    target = (k[idx] + 1) * _quarter
+    rate = E[idx + 1] - E[idx]
+    jd = t[idx] + (target - E[idx]) / rate
+    target = modpi2(target)
+    todo = np.arange(jd.size)
+    for bailout in range(20):
+        step = diff_angle(_elongation(jd[todo]), target[todo]) / rate[todo]
+        jd[todo] += step
+        todo = todo[np.abs(step) >= delta]
+        if not todo.size:
+            break
+    else:
+        raise Error("bailout")
+
+    phase = (k[idx] + 1) % 4
+    inside = (jd >= jd_start) & (jd <= jd_end)
+    return np.column_stack((jd[inside], phase[inside]))
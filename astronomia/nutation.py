@@ -39,10 +39,11 @@ edition edited by P. Kenneth Seidelman, 1992
 
 import numpy as np
 
-from astronomia.util import polynomial, modpi2, d_to_r, dms_to_d
+from astronomia.util import compile_polynomial, modpi2, d_to_r, dms_to_d, \
+    _scalar_if_one
 from astronomia.calendar import jd_to_jcent
 
-from astronomia.commonterms import kD, kM, kM1, kF, ko
+from astronomia.commonterms import pD, pM, pM1, pF, po
 
 # [Meeus-1998: table 22.A]
 #
@@ -114,17 +115,82 @@ _tbl = (
     ( 2, -1,  0,  2,  2,      -3,     0,     0,   0))
 
 
+#
+# Table 22.A in matrix form: the multipliers of D, M, M1, F and omega, one
+# row per term, and the coefficients of the sines (psi) and cosines (eps)
+# converted from 0.0001" and 0.00001" per century to radians.
+#
+_mult = np.array([t[:5] for t in _tbl], dtype=np.float64)
+_psiK = d_to_r(np.array([t[5] for t in _tbl]) / 10000.0 / 3600)
+_psiT = d_to_r(np.array([t[6] for t in _tbl]) / 100000.0 / 3600)
+_epsK = d_to_r(np.array([t[7] for t in _tbl]) / 10000.0 / 3600)
+_epsT = d_to_r(np.array([t[8] for t in _tbl]) / 100000.0 / 3600)
+
+#
+# Results of nutation() for the last few scalar epochs, keyed by Julian Day.
+# The whole cache is dropped when it holds _cache_size entries.
+#
+_cache = {}
+_cache_size = 16
+
+
 def _constants(T):
     """Return some values needed for both nutation_in_longitude() and
     nutation_in_obliquity()"""
-    D = modpi2(polynomial(kD,  T))
-    M = modpi2(polynomial(kM,  T))
-    M1 = modpi2(polynomial(kM1, T))
-    F = modpi2(polynomial(kF,  T))
-    omega = modpi2(polynomial(ko,  T))
+    D = modpi2(pD(T))
+    M = modpi2(pM(T))
+    M1 = modpi2(pM1(T))
+    F = modpi2(pF(T))
+    omega = modpi2(po(T))
     return D, M, M1, F, omega
 
 
+def nutation(jd, cache=True):
+    """Return the nutation in longitude and in obliquity.
+
+    High precision. [Meeus-1998: pg 144]
+
+    Both values come from the same arguments, so this is cheaper than
+    calling nutation_in_longitude() and nutation_in_obliquity().
+
+    Arguments:
+      - `jd` : Julian Day in dynamical time, scalar or array
+
+    Keywords:
+      - `cache` : (default=True) remember the results for scalar `jd`, so
+        that repeated queries for the same epoch are not computed again
+
+    Returns:
+      - nutation in longitude, in radians
+      - nutation in obliquity, in radians
+
+    """
+    if np.ndim(jd) == 0:
+        jd = float(jd)
+        # one lookup, another thread may clear the cache between two
+        hit = _cache.get(jd) if cache else None
+        if hit is not None:
+            return hit
+
+    shape = np.shape(jd)
+    T = jd_to_jcent(jd)
+    if np.ndim(T):
+        T = T.ravel()
+    arg = np.dot(_mult, np.array(_constants(T)))
+    sinarg = np.sin(arg)
+    cosarg = np.cos(arg)
+    deltaPsi = np.dot(_psiK, sinarg) + np.dot(_psiT, sinarg)*T
+    deltaEps = np.dot(_epsK, cosarg) + np.dot(_epsT, cosarg)*T
+    result = (_scalar_if_one(deltaPsi.reshape(shape)),
+              _scalar_if_one(deltaEps.reshape(shape)))
+
+    if cache and not shape:
+        if len(_cache) >= _cache_size:
+            _cache.clear()
+        _cache[jd] = result
+    return result
+
+
 def nutation_in_longitude(jd):
     """Return the nutation in longitude.
 
@@ -137,21 +203,7 @@ def nutation_in_longitude(jd):
       - nutation in longitude, in radians
 
     """
-    #
-    # Future optimization: factor the /1e5 and /1e6 adjustments into the table.
-    #
-    # Could turn the loop into a generator expression. Too messy?
-    #
-    T = jd_to_jcent(jd)
-    D, M, M1, F, omega = _constants(T)
-    deltaPsi = 0.0
-    for tD, tM, tM1, tF, tomega, tpsiK, tpsiT, tepsK, tepsT in _tbl:
-        arg = D*tD + M*tM + M1*tM1 + F*tF + omega*tomega
-        deltaPsi += (tpsiK/10000.0 + tpsiT/100000.0 * T) * np.sin(arg)
-
-    deltaPsi /= 3600
-    deltaPsi = d_to_r(deltaPsi)
-    return deltaPsi
+    return nutation(jd)[0]
 
 
 def nutation_in_obliquity(jd):
@@ -166,21 +218,7 @@ def nutation_in_obliquity(jd):
       - nutation in obliquity, in radians
 
     """
-    #
-    # Future optimization: factor the /1e5 and /1e6 adjustments into the table.
-    #
-    # Could turn the loop into a generator expression. Too messy?
-    #
-    T = jd_to_jcent(jd)
-    D, M, M1, F, omega = _constants(T)
-    deltaEps = 0.0
-    for tD, tM, tM1, tF, tomega, tpsiK, tpsiT, tepsK, tepsT in _tbl:
-        arg = D*tD + M*tM + M1*tM1 + F*tF + omega*tomega
-        deltaEps = deltaEps + (tepsK/10000.0 +
-                               tepsT/100000.0 * T) * np.cos(arg)
-    deltaEps = deltaEps / 3600
-    deltaEps = d_to_r(deltaEps)
-    return deltaEps
+    return nutation(jd)[1]
 
 #
 # Constant terms
@@ -189,6 +227,7 @@ _el0 = (d_to_r(dms_to_d(23, 26, 21.448)),
         d_to_r(dms_to_d(0, 0, -46.8150)),
         d_to_r(dms_to_d(0, 0, -0.00059)),
         d_to_r(dms_to_d(0, 0, 0.001813)))
+_pel0 = compile_polynomial(_el0)
 
 
 def obliquity(jd):
@@ -205,7 +244,7 @@ def obliquity(jd):
 
     """
     T = jd_to_jcent(jd)
-    return polynomial(_el0, T)
+    return _pel0(T)
 
 
 #
@@ -222,6 +261,7 @@ _el1 = (d_to_r(dms_to_d(23, 26, 21.448)),
         d_to_r(dms_to_d(0, 0, 27.87)),
         d_to_r(dms_to_d(0, 0, 5.79)),
         d_to_r(dms_to_d(0, 0, 2.45)))
+_pel1 = compile_polynomial(_el1)
 
 
 def obliquity_hi(jd):
@@ -240,4 +280,4 @@ def obliquity_hi(jd):
 
     """
     U = jd_to_jcent(jd) / 100
-    return polynomial(_el1, U)
+    return _pel1(U)
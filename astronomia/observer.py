@@ -0,0 +1,98 @@
+"""
+    Copyright 2000, 2001 Astrolabe by William McClain
+
+    Forked in 2013 to Astronomia
+
+    Copyright 2013 Astronomia by Tim Cera
+
+    This file is part of Astronomia.
+
+    Astronomia is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    Astronomia is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Astronomia; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+    """
+
+
+"""The place and time zones of an observer.
+
+An Observer holds the values that astronomia.globals holds for the whole
+program, and the functions which need them take one as their `observer`
+keyword. An Observer cannot be changed once created, so that one can be
+shared between threads: computing for several sites at once means passing
+a different Observer to each call instead of setting the globals in turn.
+
+When the keyword is None, the functions use Observer.from_globals().
+
+"""
+
+from collections import namedtuple
+
+import astronomia.globals
+
+
+class Error(Exception):
+    """Local exception class"""
+    pass
+
+
+_fields = ("latitude",
+           "longitude",
+           "standard_timezone_name",
+           "standard_timezone_offset",
+           "daylight_timezone_name",
+           "daylight_timezone_offset")
+
+
+class Observer(namedtuple("Observer", _fields)):
+    """An observer on the Earth, see astronomia.globals for the fields.
+
+    The latitude and longitude may be arrays of the same shape, for sites
+    which share their time zones.
+
+    """
+    __slots__ = ()
+
+    def __new__(cls, latitude=0.0, longitude=0.0,
+                standard_timezone_name="UT", standard_timezone_offset=0.0,
+                daylight_timezone_name=None, daylight_timezone_offset=None):
+        """
+        Keywords:
+          - `latitude`  : (float, default=0.0) in radians, positive north
+          - `longitude` : (float, default=0.0) in radians, positive west of
+            Greenwich
+          - `standard_timezone_name`   : (str, default="UT")
+          - `standard_timezone_offset` : (float, default=0.0) fraction of
+            day subtracted from UT
+          - `daylight_timezone_name`   : (str, default=None) None for no
+            daylight savings time
+          - `daylight_timezone_offset` : (float, default=None) fraction of
+            day subtracted from UT
+
+        """
+        if daylight_timezone_name is not None and \
+                daylight_timezone_offset is None:
+            raise Error("daylight_timezone_offset is required with "
+                        "daylight_timezone_name")
+        return super(Observer, cls).__new__(
+            cls, latitude, longitude, standard_timezone_name,
+            standard_timezone_offset, daylight_timezone_name,
+            daylight_timezone_offset)
+
+    @classmethod
+    def from_globals(cls):
+        """Return an Observer with the current values of astronomia.globals
+        """
+        g = astronomia.globals
+        return cls(g.latitude, g.longitude, g.standard_timezone_name,
+                   g.standard_timezone_offset, g.daylight_timezone_name,
+                   g.daylight_timezone_offset)
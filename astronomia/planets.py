@@ -24,12 +24,16 @@
     The VSOP87d planetary position model
     """
 
+import importlib
+import os
+
 import numpy as np
 
+import astronomia.globals
 from astronomia.constants import pi2
 from astronomia.calendar import jd_to_jcent
-from astronomia.util import d_to_r, dms_to_d, polynomial, modpi2, diff_angle, \
-    _scalar_if_one
+from astronomia.util import d_to_r, dms_to_d, compile_polynomial, modpi2, \
+    diff_angle, _scalar_if_one
 from astronomia.coordinates import ecl_to_equ
 
 
@@ -45,14 +49,68 @@ planet_names = ("Mercury", "Venus", "Earth", "Mars", "Jupiter",
 coordinate_names = ("L", "B", "R")
 
 #
-# Local dictionary of planetary terms.
+# Local dictionary of planetary terms, filled on first use of each planet
+# and coordinate by _series_of().
 #
 # The key is a tuple (planet_name, coordinate_name)
 #
-# The value of each entry is a list of lists.
+# The value of each entry is a list with one array per power of tau. Each
+# array has shape (3, N) and holds the A, B and C coefficients of the N terms
+# of that series as contiguous float64 rows.
 #
 _planets = {}
 
+#
+# The memory-mapped binary database, if one is in use: a tuple of the
+# float64 data block and a dictionary keyed like _planets whose values are
+# lists of (offset, count) per power of tau. None means that the terms are
+# imported from the text database.
+#
+_binary_db = None
+
+#
+# Amplitude cut-offs of the truncated series, in radians (L, B) or au (R).
+# The terms of each series are sorted by decreasing amplitude, so a truncated
+# series is simply a prefix of the full one.
+#
+# Speed and accuracy for the Earth: dimension3 for 1000 epochs, maximum error
+# against the full series over 2000 epochs between the years 1000 and 3000,
+# and the bound returned by truncation_tiers(). Errors are in arcseconds for
+# L and B and in arcseconds-at-1-au for R.
+#
+#   cut-off  terms (L+B+R)   time      max error L / B / R   bound L / B / R
+#   1e-4        10            0.3 ms   40   / 1.1  / 23      94  / 1.8 / 40
+#   1e-5        25            0.5 ms   11   / 1.1  / 6.8     28  / 1.8 / 14
+#   1e-6        69            1.0 ms   2.1  / 0.51 / 1.3     8.2 / 1.0 / 4.4
+#   1e-7       213            3.1 ms   0.26 / 0.14 / 0.23    1.9 / 0.5 / 1.2
+#   1e-8       621            8.5 ms   0.04 / 0.02 / 0.04    0.4 / 0.1 / 0.3
+#   full      2425           33   ms   0    / 0    / 0       0   / 0   / 0
+#
+_tier_cutoffs = (1e-4, 1e-5, 1e-6, 1e-7, 1e-8)
+
+#
+# Truncated series, computed on first use. The key is a tuple (planet_name,
+# coordinate_name) and the value a list of (cutoff, nterms, bound, series)
+# tuples ordered from the coarsest to the finest tier.
+#
+_tiers = {}
+
+#
+# All series of all planets concatenated into one table for
+# VSOP87d.all_positions(), built on first use. See _combined_table().
+#
+_combined = {}
+
+#
+# Days per Julian millenium, the unit of tau
+#
+_days_per_millenium = 365250.0
+
+#
+# Radians per arcsecond
+#
+_arcsec = d_to_r(1.0/3600.0)
+
 _first_time = True
 
 
@@ -68,15 +126,16 @@ class VSOP87d:
         only once to save time and space.
 
         """
-        global _first_time
-
         if not _first_time:
             return
 
-        load_vsop87d_text_db()
-        _first_time = False
+        path = astronomia.globals.vsop87d_binary_path
+        if path is not None and os.path.exists(path):
+            load_vsop87d_binary_db(path)
+        else:
+            load_vsop87d_text_db()
 
-    def dimension(self, jd, planet, dim):
+    def dimension(self, jd, planet, dim, precision=None):
         """Return one of heliocentric ecliptic longitude, latitude and radius.
         [Meeus-1998: pg 218]
 
@@ -87,27 +146,38 @@ class VSOP87d:
           - `dim`    : must be one of "L" (longitude) or "B" (latitude) or "R"
             (radius)
 
+        Keywords:
+          - `precision` : (float, default=None) acceptable error in
+            arcseconds. The cheapest truncated series whose error bound (see
+            truncation_tiers()) does not exceed it is evaluated. For "R" the
+            bound is in au, compared to the precision in radians. None
+            evaluates the full series.
+
         Returns:
           - longitude in radians, or latitude in radians, or radius in au,
-            depending on the value of `dim`.
+            depending on the value of `dim`. An array of Julian Days gives an
+            array of the same shape, one value per epoch.
 
         """
-        jd = np.atleast_1d(jd)
-        X = 0.0
+        shape = np.shape(jd)
+        tau = np.atleast_1d(jd_to_jcent(jd)).ravel()/10.0
+        X = np.zeros_like(tau)
         tauN = 1.0
-        tau = jd_to_jcent(jd)/10.0
-        c = _planets[(planet, dim)]
+        if precision is None:
+            c = _series_of(planet, dim)
+        else:
+            c = _truncated(planet, dim, precision*_arcsec)
 
-        for s in c:
-            X += np.sum([A*np.cos(B + C*tau) for A, B, C in s])*tauN
+        for terms in c:
+            X += _series_sum(terms, tau)*tauN
             tauN = tauN*tau  # last calculation is wasted
 
         if dim == "L":
             X = modpi2(X)
 
-        return _scalar_if_one(X)
+        return _scalar_if_one(X.reshape(shape))
 
-    def dimension3(self, jd, planet):
+    def dimension3(self, jd, planet, precision=None):
         """Return heliocentric ecliptic longitude, latitude and radius.
 
         Arguments:
@@ -115,17 +185,291 @@ class VSOP87d:
           - `planet` : must be one of ("Mercury", "Venus", "Earth", "Mars",
             "Jupiter", "Saturn", "Uranus", "Neptune")
 
+        Keywords:
+          - `precision` : (float, default=None) acceptable error in
+            arcseconds, see dimension()
+
         Returns:
           - longitude in radians
           - latitude in radians
           - radius in au
 
         """
-        L = self.dimension(jd, planet, "L")
-        B = self.dimension(jd, planet, "B")
-        R = self.dimension(jd, planet, "R")
+        L = self.dimension(jd, planet, "L", precision)
+        B = self.dimension(jd, planet, "B", precision)
+        R = self.dimension(jd, planet, "R", precision)
         return L, B, R
 
+    def dimension3_with_rates(self, jd, planet, precision=None):
+        """Return heliocentric ecliptic longitude, latitude and radius and
+        their time derivatives.
+
+        The derivatives come from the differentiated series,
+
+            d/dtau (A*cos(B + C*tau)*tau^n) =
+                n*A*cos(B + C*tau)*tau^(n-1) - A*C*sin(B + C*tau)*tau^n
+
+        evaluated in the same pass as the positions.
+
+        Arguments:
+          - `jd`     : Julian Day in dynamical time
+          - `planet` : must be one of ("Mercury", "Venus", "Earth", "Mars",
+            "Jupiter", "Saturn", "Uranus", "Neptune")
+
+        Keywords:
+          - `precision` : (float, default=None) acceptable error in
+            arcseconds, see dimension()
+
+        Returns:
+          - longitude in radians
+          - latitude in radians
+          - radius in au
+          - rate of change of longitude in radians per day
+          - rate of change of latitude in radians per day
+          - rate of change of radius in au per day
+
+        """
+        shape = np.shape(jd)
+        tau = np.atleast_1d(jd_to_jcent(jd)).ravel()/10.0
+        values = []
+        rates = []
+        for dim in coordinate_names:
+            if precision is None:
+                c = _series_of(planet, dim)
+            else:
+                c = _truncated(planet, dim, precision*_arcsec)
+
+            X = np.zeros_like(tau)
+            dX = np.zeros_like(tau)
+            tauN1 = 0.0  # tau^(n-1), with 0*tau^-1 = 0 for n = 0
+            tauN = 1.0
+            for n, terms in enumerate(c):
+                S, dS = _series_sum_and_rate(terms, tau)
+                X += S*tauN
+                dX += n*S*tauN1 + dS*tauN
+                tauN1 = tauN
+                tauN = tauN*tau
+
+            if dim == "L":
+                X = modpi2(X)
+            values.append(_scalar_if_one(X.reshape(shape)))
+            rates.append(_scalar_if_one((dX/_days_per_millenium).reshape(
+                shape)))
+        return tuple(values + rates)
+
+    def all_positions(self, jd, rectangular=False):
+        """Return the heliocentric positions of all planets at once.
+
+        For a few epochs every term of every planet is evaluated in a single
+        pass over a combined table, which avoids the per-call overhead of
+        calling dimension3() for each planet. Longer batches share the
+        epochs and powers of tau between all series.
+
+        Arguments:
+          - `jd` : Julian Day in dynamical time, scalar or array
+
+        Keywords:
+          - `rectangular` : (bool, default=False) If True, return
+            heliocentric ecliptic rectangular coordinates x, y, z in au
+            instead of longitude, latitude and radius
+
+        Returns:
+          - array of shape (8,) + shape of `jd` + (3,). The first axis
+            follows planet_names, the last one holds longitude in radians,
+            latitude in radians and radius in au (or x, y, z).
+
+        """
+        terms, starts, powers, assign = _combined_table()
+        A, B, C = terms
+        shape = np.shape(jd)
+        tau = np.atleast_1d(jd_to_jcent(jd)).ravel()/10.0
+
+        if tau.size <= max(1, _chunk_size // A.size):
+            sums = np.add.reduceat(
+                A[:, None]*np.cos(B[:, None] + np.outer(C, tau)), starts,
+                axis=0)
+            X = np.dot(assign, sums*tau**powers[:, None])
+        else:
+            # Long batches are bound by the cosines; evaluating series by
+            # series keeps the temporaries in cache.
+            X = np.zeros((assign.shape[0], tau.size))
+            tauN = tau**np.arange(powers.max() + 1)[:, None]
+            for k, start in enumerate(starts):
+                stop = starts[k + 1] if k + 1 < len(starts) else A.size
+                row = np.flatnonzero(assign[:, k])[0]
+                X[row] += _series_sum(terms[:, start:stop], tau) * \
+                    tauN[powers[k]]
+
+        X = X.reshape(len(planet_names), len(coordinate_names), tau.size)
+        L = modpi2(X[:, 0])
+        B = X[:, 1]
+        R = X[:, 2]
+        if rectangular:
+            cosB = np.cos(B)
+            X = np.stack((R*cosB*np.cos(L), R*cosB*np.sin(L), R*np.sin(B)),
+                         axis=-1)
+        else:
+            X = np.stack((L, B, R), axis=-1)
+        return X.reshape((len(planet_names),) + shape + (3,))
+
+
+def truncation_tiers(planet, dim):
+    """Return the truncated versions of one VSOP87d series.
+
+    A tier keeps the terms whose amplitude is at least its cut-off. The error
+    bound is the sum of the amplitudes of the dropped terms, which holds for
+    |tau| <= 1, i.e. for the years 1000 to 3000; outside that range the
+    terms multiplied by powers of tau grow and the bound no longer applies.
+
+    Arguments:
+      - `planet` : must be one of ("Mercury", "Venus", "Earth", "Mars",
+        "Jupiter", "Saturn", "Uranus", "Neptune")
+      - `dim`    : must be one of "L" (longitude) or "B" (latitude) or "R"
+        (radius)
+
+    Returns:
+      - list of (cutoff, number of terms, error bound in arcseconds) tuples,
+        ordered from the coarsest to the finest tier. For "R" the cut-off
+        and bound are in au and arcseconds-at-1-au respectively.
+
+    """
+    return [(cutoff, nterms, float(bound/_arcsec))
+            for cutoff, nterms, bound, series in _tiers_of(planet, dim)]
+
+
+def _tiers_of(planet, dim):
+    """Return the cached tiers of one series, building them on first use"""
+    key = (planet, dim)
+    try:
+        return _tiers[key]
+    except KeyError:
+        pass
+
+    full = _series_of(planet, dim)
+    tiers = []
+    for cutoff in _tier_cutoffs:
+        series = []
+        nterms = 0
+        bound = 0.0
+        for terms in full:
+            amplitude = np.abs(terms[0])
+            n = int(np.count_nonzero(amplitude >= cutoff))
+            series.append(terms[:, :n])
+            nterms += n
+            bound += amplitude[n:].sum()
+        tiers.append((cutoff, nterms, bound, series))
+    _tiers[key] = tiers
+    return tiers
+
+
+def _combined_table():
+    """Return the combined term table used by VSOP87d.all_positions().
+
+    Returns:
+      - (3, N) array of the A, B, C coefficients of every non-empty series,
+        one series after the other
+      - index of the first term of each series
+      - power of tau of each series
+      - (24, series) matrix adding each series to its (planet, coordinate)
+        row, rows ordered by planet_names then coordinate_names
+
+    """
+    if not _combined:
+        blocks = []
+        starts = []
+        powers = []
+        rows = []
+        nterms = 0
+        for ip, planet in enumerate(planet_names):
+            for ic, dim in enumerate(coordinate_names):
+                for power, terms in enumerate(_series_of(planet, dim)):
+                    if terms.shape[1] == 0:
+                        continue
+                    blocks.append(terms)
+                    starts.append(nterms)
+                    powers.append(power)
+                    rows.append(ip*len(coordinate_names) + ic)
+                    nterms += terms.shape[1]
+        assign = np.zeros((len(planet_names)*len(coordinate_names),
+                           len(starts)))
+        assign[rows, np.arange(len(starts))] = 1.0
+        _combined["table"] = (np.concatenate(blocks, axis=1),
+                              np.array(starts), np.array(powers), assign)
+    return _combined["table"]
+
+
+def _truncated(planet, dim, precision):
+    """Return the cheapest series whose error bound is within `precision`,
+    in radians or au.
+    """
+    for cutoff, nterms, bound, series in _tiers_of(planet, dim):
+        if bound <= precision:
+            return series
+    return _series_of(planet, dim)
+
+
+#
+# Upper bound on the number of terms x epochs values evaluated at once by
+# _series_sum(). Large batches of epochs are split into chunks so that the
+# temporary arrays stay a few megabytes in size.
+#
+_chunk_size = 2**18
+
+
+def _series_sum(terms, tau):
+    """Sum one series of VSOP87d terms for each epoch.
+
+    Arguments:
+      - `terms` : (3, N) array of the A, B and C coefficients of the series
+      - `tau`   : 1-D array of Julian millenia since J2000.0
+
+    Returns:
+      - 1-D array of sum(A*cos(B + C*tau)), one value per epoch
+
+    """
+    A, B, C = terms
+    if tau.size == 1:
+        return np.dot(A, np.cos(B + C*tau[0]))[None]
+
+    step = max(1, _chunk_size // max(1, A.size))
+    if tau.size <= step:
+        return np.dot(A, np.cos(B[:, None] + np.outer(C, tau)))
+
+    result = np.empty_like(tau)
+    for i in range(0, tau.size, step):
+        t = tau[i:i + step]
+        result[i:i + step] = np.dot(A, np.cos(B[:, None] + np.outer(C, t)))
+    return result
+
+
+def _series_sum_and_rate(terms, tau):
+    """Sum one series of VSOP87d terms and its derivative for each epoch.
+
+    Arguments:
+      - `terms` : (3, N) array of the A, B and C coefficients of the series
+      - `tau`   : 1-D array of Julian millenia since J2000.0
+
+    Returns:
+      - 1-D array of sum(A*cos(B + C*tau)), one value per epoch
+      - 1-D array of its derivative with respect to tau,
+        -sum(A*C*sin(B + C*tau))
+
+    """
+    A, B, C = terms
+    AC = -A*C
+    if tau.size == 1:
+        arg = B + C*tau[0]
+        return np.dot(A, np.cos(arg))[None], np.dot(AC, np.sin(arg))[None]
+
+    step = max(1, _chunk_size // max(1, A.size))
+    S = np.empty_like(tau)
+    dS = np.empty_like(tau)
+    for i in range(0, tau.size, step):
+        arg = B[:, None] + np.outer(C, tau[i:i + step])
+        S[i:i + step] = np.dot(A, np.cos(arg))
+        dS[i:i + step] = np.dot(AC, np.sin(arg))
+    return S, dS
+
 
 #
 # Constant terms
@@ -134,6 +478,7 @@ _k0 = d_to_r(-1.397)
 _k1 = d_to_r(-0.00031)
 _k2 = d_to_r(dms_to_d(0, 0, -0.09033))
 _k3 = d_to_r(dms_to_d(0, 0,  0.03916))
+_pk = compile_polynomial((0.0, _k0, _k1))
 
 
 def vsop_to_fk5(jd, L, B):
@@ -154,7 +499,7 @@ def vsop_to_fk5(jd, L, B):
     """
     jd = np.atleast_1d(jd)
     T = jd_to_jcent(jd)
-    L1 = polynomial([L, _k0, _k1], T)
+    L1 = L + _pk(T)
     cosL1 = np.cos(L1)
     sinL1 = np.sin(L1)
     deltaL = _k2 + _k3*(cosL1 + sinL1)*np.tan(B)
@@ -162,39 +507,54 @@ def vsop_to_fk5(jd, L, B):
     return _scalar_if_one(modpi2(L + deltaL)), _scalar_if_one(B + deltaB)
 
 
-def geocentric_planet(jd, planet, deltaPsi, epsilon, delta):
+def geocentric_planet(jd, planet, deltaPsi, epsilon, delta, iterations=None):
     """Calculate the equatorial coordinates of a planet
 
     The results will be geocentric, corrected for light-time and
     aberration.
 
+    All epochs of an array are iterated together; an epoch drops out of the
+    iteration as soon as it has converged.
+
     Arguments:
-      - `jd`       : Julian Day in dynamical time
+      - `jd`       : Julian Day in dynamical time, scalar or array
       - `planet`   : must be one of ("Mercury", "Venus", "Earth", "Mars",
         "Jupiter", "Saturn", "Uranus", "Neptune")
       - `deltaPsi` : nutation in longitude, in radians
       - `epsilon`  : True obliquity (corrected for nutation), in radians
       - `delta`    : desired accuracy, in days
 
+    Keywords:
+      - `iterations` : (int, default=None) If given, make exactly this many
+        light-time passes without testing for convergence, at least one.
+        Three passes are always enough.
+
     Returns:
       - right accension, in radians
       - declination, in radians
 
     """
-    jd = np.atleast_1d(jd)
+    if iterations is not None and iterations < 1:
+        raise Error("iterations must be at least 1 = " + str(iterations))
+    shape = np.shape(jd)
+    jd = np.atleast_1d(jd).ravel()
     vsop = VSOP87d()
-    t = jd
-    l0 = -100.0  # impossible value
+    t = jd.copy()
+    l = np.empty_like(jd)
+    b = np.empty_like(jd)
+    l0 = np.empty_like(jd)
+    l0[:] = -100.0  # impossible value
+    todo = np.arange(jd.size)
     # We need to iterate to correct for light-time and aberration.
     # At most three passes through the loop always nails it.
     # Note that we move both the Earth and the other planet during
     #    the iteration.
-    for bailout in range(20):
+    for bailout in range(20 if iterations is None else iterations):
         # heliocentric geometric ecliptic coordinates of the Earth
-        L0, B0, R0 = vsop.dimension3(t, "Earth")
+        L0, B0, R0 = vsop.dimension3(t[todo], "Earth")
 
         # heliocentric geometric ecliptic coordinates of the planet
-        L, B, R = vsop.dimension3(t, planet)
+        L, B, R = vsop.dimension3(t[todo], planet)
 
         # rectangular offset
         cosB0 = np.cos(B0)
@@ -206,8 +566,8 @@ def geocentric_planet(jd, planet, deltaPsi, epsilon, delta):
         # geocentric geometric ecliptic coordinates of the planet
         x2 = x*x
         y2 = y*y
-        l = np.arctan2(y, x)
-        b = np.arctan2(z, np.sqrt(x2 + y2))
+        l[todo] = np.arctan2(y, x)
+        b[todo] = np.arctan2(z, np.sqrt(x2 + y2))
 
         # distance to planet in AU
         dist = np.sqrt(x2 + y2 + z*z)
@@ -215,17 +575,23 @@ def geocentric_planet(jd, planet, deltaPsi, epsilon, delta):
         # light time in days
         tau = 0.0057755183 * dist
 
-        if abs(diff_angle(l, l0)) < pi2 * delta:
-            break
+        if iterations is None:
+            done = np.abs(diff_angle(l[todo], l0[todo])) < pi2 * delta
+        else:
+            done = np.zeros(todo.shape, dtype=bool)
 
         # adjust for light travel time and try again
-        l0 = l
-        t = jd - tau
+        l0[todo] = l[todo]
+        t[todo] = jd[todo] - tau
+        todo = todo[~done]
+        if todo.size == 0:
+            break
     else:
-        raise Error("bailout")
+        if iterations is None:
+            raise Error("bailout")
 
     # transform to FK5 ecliptic and equinox
-    l, b = vsop_to_fk5(jd, l, b)
+    l, b = vsop_to_fk5(jd.reshape(shape), l.reshape(shape), b.reshape(shape))
 
     # nutation in longitude
     l = l + deltaPsi
@@ -236,13 +602,203 @@ def geocentric_planet(jd, planet, deltaPsi, epsilon, delta):
     return ra, dec
 
 
+def _series_of(planet, dim):
+    """Return the packed series of one planet and coordinate.
+
+    The terms are loaded on first use, from the binary database if one was
+    loaded, otherwise by importing the text module of that planet only.
+
+    """
+    key = (planet, dim)
+    try:
+        return _planets[key]
+    except KeyError:
+        pass
+
+    if planet not in planet_names:
+        raise Error("unknown planet = " + planet)
+    if dim not in coordinate_names:
+        raise Error("unknown dimension = " + dim)
+
+    if _binary_db is None:
+        module = importlib.import_module("astronomia.vsop87d_" +
+                                         planet.lower())
+        series = _pack(module._series[dim])
+    else:
+        data, index = _binary_db
+        series = [data[offset:offset + 3*count].reshape(3, count)
+                  for offset, count in index[key]]
+    _planets[key] = series
+    return series
+
+
+def memory_usage():
+    """Return the memory used by the VSOP87d tables loaded so far.
+
+    Tables are loaded per planet and coordinate on first use. When they come
+    from a binary database the size is that of the mapped coefficients,
+    which are paged in as they are used and shared between processes.
+
+    Returns:
+      - dictionary keyed by (planet_name, coordinate_name), plus "combined"
+        once VSOP87d.all_positions() has built its table, with the size of
+        the coefficient arrays in bytes
+
+    """
+    usage = dict((key, sum(terms.nbytes for terms in series))
+                 for key, series in _planets.items())
+    if _combined:
+        usage["combined"] = sum(a.nbytes for a in _combined["table"])
+    return usage
+
+
+def _reset():
+    """Forget the loaded tables and everything derived from them"""
+    _planets.clear()
+    _tiers.clear()
+    _combined.clear()
+
+
 def load_vsop87d_text_db():
-    """Load the text version of the VSOP87d database into memory.
+    """Use the text version of the VSOP87d database.
+
+    The text version is made of the astronomia.vsop87d_<planet> modules.
+    Each of them is imported the first time one of its series is needed;
+    importing them is slow, so prefer load_vsop87d_binary_db() once a binary
+    database has been written with write_vsop87d_binary_db().
 
     IMPORTANT: normally you don't call this routine directly.
     That is done automatically by the __init__() method of the VSOP87d
     class.
 
     """
-    global _planets
-    from astronomia.vsop87d_dict import _planets
+    global _binary_db, _first_time
+
+    _binary_db = None
+    _first_time = False
+    _reset()
+
+
+def _pack(series):
+    """Convert the nested lists of the text database to term arrays.
+
+    Arguments:
+      - `series` : list of series of [A, B, C] terms, one per power of tau
+
+    Returns:
+      - list of (3, N) float64 arrays, one per power of tau, with the terms
+        sorted by decreasing amplitude
+
+    """
+    packed = []
+    for s in series:
+        terms = np.array(s, dtype=np.float64).reshape(-1, 3)
+        order = np.argsort(-np.abs(terms[:, 0]), kind="mergesort")
+        packed.append(np.ascontiguousarray(terms[order].T))
+    return packed
+
+
+#
+# Layout of the binary database:
+#
+#   - header: 8 byte magic string, uint32 format version, uint32 number of
+#     series
+#   - index: one row of five int64 per series (planet index, coordinate
+#     index, power of tau, offset and number of terms). The offset counts
+#     float64 values from the start of the data block.
+#   - data: float64 values; each series is stored as its A row, then its B
+#     row, then its C row.
+#
+# Everything is little-endian and the data block is 8-byte aligned, so it
+# can be memory-mapped and sliced without copying.
+#
+# Version 2: the terms of each series are sorted by decreasing amplitude.
+#
+_binary_magic = b"VSOP87DB"
+_binary_version = 2
+_header_dtype = np.dtype([("magic", "S8"), ("version", "<u4"),
+                          ("nseries", "<u4")])
+
+
+def write_vsop87d_binary_db(path):
+    """Write the VSOP87d database to a binary file.
+
+    The file can afterwards be loaded with load_vsop87d_binary_db(), or
+    automatically by VSOP87d() if astronomia.globals.vsop87d_binary_path
+    points at it.
+
+    Arguments:
+      - `path` : name of the file to write
+
+    Returns:
+      - nothing
+
+    """
+    from astronomia.vsop87d_dict import _planets as text_db
+
+    index = []
+    blocks = []
+    offset = 0
+    for ip, planet in enumerate(planet_names):
+        for ic, dim in enumerate(coordinate_names):
+            for power, terms in enumerate(_pack(text_db[(planet, dim)])):
+                count = terms.shape[1]
+                index.append((ip, ic, power, offset, count))
+                blocks.append(terms.ravel())
+                offset += 3*count
+
+    header = np.zeros(1, dtype=_header_dtype)
+    header["magic"] = _binary_magic
+    header["version"] = _binary_version
+    header["nseries"] = len(index)
+    with open(path, "wb") as f:
+        f.write(header.tobytes())
+        f.write(np.array(index, dtype="<i8").tobytes())
+        f.write(np.concatenate(blocks).astype("<f8").tobytes())
+
+
+def load_vsop87d_binary_db(path):
+    """Memory-map the binary version of the VSOP87d database.
+
+    Only the index is read. The coefficients are not read into memory: the
+    operating system pages them in on first use and shares them between all
+    processes mapping the same file.
+
+    IMPORTANT: normally you don't call this routine directly.
+    That is done automatically by the __init__() method of the VSOP87d
+    class when astronomia.globals.vsop87d_binary_path is set. A database
+    loaded before the first VSOP87d() is kept.
+
+    Arguments:
+      - `path` : name of a file written by write_vsop87d_binary_db()
+
+    Returns:
+      - nothing
+
+    """
+    global _binary_db, _first_time
+
+    with open(path, "rb") as f:
+        header = np.fromfile(f, dtype=_header_dtype, count=1)
+        if header.size != 1 or header["magic"][0] != _binary_magic:
+            raise Error("not a VSOP87d binary database: " + path)
+        if header["version"][0] != _binary_version:
+            raise Error("unsupported VSOP87d binary database version %d" %
+                        header["version"][0])
+        nseries = int(header["nseries"][0])
+        index = np.fromfile(f, dtype="<i8", count=5*nseries).reshape(-1, 5)
+
+    data = np.memmap(path, dtype="<f8", mode="r",
+                     offset=_header_dtype.itemsize + index.nbytes)
+    data = data.view(np.ndarray)
+    series_index = {}
+    for ip, ic, power, offset, count in index:
+        key = (planet_names[ip], coordinate_names[ic])
+        series = series_index.setdefault(key, [])
+        if power != len(series):
+            raise Error("corrupt VSOP87d binary database: " + path)
+        series.append((offset, count))
+
+    _binary_db = (data, series_index)
+    _first_time = False
+    _reset()
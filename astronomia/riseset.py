@@ -24,26 +24,35 @@
 
 """Compute Rise, Set, and Transit times.
 
-Each of the routines requires three equatorial coordinates for the
-object: yesterday, today and tomorrow, all at 0hr UT.
+Each of the routines rise(), settime() and transit() requires three
+equatorial coordinates for the object: yesterday, today and tomorrow, all
+at 0hr UT.
 
 This approach is inadequate for the Moon, which moves too fast to
 be accurately interpolated from three daily positions.
 
 Bug: each of the routines drops some events which occur near 0hr UT.
 
+rise_set_transit() computes the coordinates itself for a range of days and
+does not drop those events. Its times for the Moon are within about 15
+seconds of the ones that the exact positions give.
+
 """
 
 import numpy as np
 
 from astronomia.calendar import sidereal_time_greenwich
 from astronomia.constants import seconds_per_day, pi2, earth_equ_radius, \
-    standard_rst_altitude
+    standard_rst_altitude, sun_rst_altitude
 from astronomia.dynamical import deltaT_seconds
 from astronomia.util import d_to_r, interpolate_angle3, diff_angle, r_to_d, \
     modpi2, interpolate3
-from astronomia.coordinates import equ_to_horiz
-import astronomia.globals
+from astronomia.coordinates import ecl_to_equ, equ_to_horiz
+from astronomia.nutation import nutation, obliquity
+from astronomia.lunar import Lunar
+from astronomia.planets import geocentric_planet, planet_names, vsop_to_fk5
+from astronomia.observer import Observer
+from astronomia.sun import Sun, aberration_low
 
 
 class Error(Exception):
@@ -54,7 +63,7 @@ class Error(Exception):
 _k1 = d_to_r(360.985647)
 
 
-def rise(jd, raList, decList, h0, delta):
+def rise(jd, raList, decList, h0, delta, observer=None):
     """Return the Julian Day of the rise time of an object.
 
     Arguments:
@@ -67,57 +76,23 @@ def rise(jd, raList, decList, h0, delta):
       - `delta`  : (float) desired accuracy in days. Times less than one minute
         are infeasible for rise times because of atmospheric refraction.
 
-    Returns:
-      - Julian Day of the rise time
+    Keywords:
+      - `observer` : (Observer, default=None) Observer.from_globals() when
+        None
 
-    """
-    longitude = astronomia.globals.longitude
-    latitude = astronomia.globals.latitude
-    THETA0 = sidereal_time_greenwich(jd)
-    deltaT_days = deltaT_seconds(jd) / seconds_per_day
+    For several days at once, `jd` may be an array and each of the three
+    items of `raList` and `decList` an array of the same shape. The
+    latitude and longitude of `observer` may be arrays too.
 
-    cosH0 = (np.sin(h0) - np.sin(latitude)*np.sin(decList[1])) / (
-        np.cos(latitude)*np.cos(decList[1]))
-    #
-    # future: return some indicator when the object is circumpolar or always
-    # below the horizon.
-    #
-    if cosH0 < -1.0:  # circumpolar
-        return None
-    if cosH0 > 1.0:  # never rises
-        return None
-
-    H0 = np.acos(cosH0)
-    m0 = (raList[1] + longitude - THETA0) / pi2
-    m = m0 - H0 / pi2  # the only difference between rise() and settime()
-    if m < 0:
-        m += 1
-    elif m > 1:
-        m -= 1
-    if not 0 <= m <= 1:
-        raise Error("m is out of range = " + str(m))
-    for bailout in range(20):
-        m0 = m
-        theta0 = modpi2(THETA0 + _k1 * m)
-        n = m + deltaT_days
-        if not -1 < n < 1:
-            return None  # Bug: this is where we drop some events
-        ra = interpolate_angle3(n, raList)
-        dec = interpolate3(n, decList)
-        H = theta0 - longitude - ra
-#        if H > pi:
-#            H = H - pi2
-        H = diff_angle(0.0, H)
-        A, h = equ_to_horiz(H, dec)
-        dm = (h - h0) / (pi2 * np.cos(dec) * np.cos(latitude) * np.sin(H))
-        m += dm
-        if abs(m - m0) < delta:
-            return jd + m
+    Returns:
+      - Julian Day of the rise time, None if there is no rise (NaN in an
+        array result, also for the days that do not converge)
 
-    raise Error("bailout")
+    """
+    return _rise_or_set(jd, raList, decList, h0, delta, -1.0, observer)
 
 
-def settime(jd, raList, decList, h0, delta):
+def settime(jd, raList, decList, h0, delta, observer=None):
     """Return the Julian Day of the set time of an object.
 
     Arguments:
@@ -130,57 +105,23 @@ def settime(jd, raList, decList, h0, delta):
       - `delta`   : desired accuracy in days. Times less than one minute are
         infeasible for set times because of atmospheric refraction.
 
-    Returns:
-      - Julian Day of the set time
+    Keywords:
+      - `observer` : (Observer, default=None) Observer.from_globals() when
+        None
 
-    """
-    longitude = astronomia.globals.longitude
-    latitude = astronomia.globals.latitude
-    THETA0 = sidereal_time_greenwich(jd)
-    deltaT_days = deltaT_seconds(jd) / seconds_per_day
+    For several days at once, `jd` may be an array and each of the three
+    items of `raList` and `decList` an array of the same shape. The
+    latitude and longitude of `observer` may be arrays too.
 
-    cosH0 = (np.sin(h0) - np.sin(latitude)*np.sin(decList[1])) / (
-        np.cos(latitude)*np.cos(decList[1]))
-    #
-    # future: return some indicator when the object is circumpolar or always
-    # below the horizon.
-    #
-    if cosH0 < -1.0:  # circumpolar
-        return None
-    if cosH0 > 1.0:  # never rises
-        return None
-
-    H0 = np.acos(cosH0)
-    m0 = (raList[1] + longitude - THETA0) / pi2
-    m = m0 + H0 / pi2  # the only difference between rise() and settime()
-    if m < 0:
-        m += 1
-    elif m > 1:
-        m -= 1
-    if not 0 <= m <= 1:
-        raise Error("m is out of range = " + str(m))
-    for bailout in range(20):
-        m0 = m
-        theta0 = modpi2(THETA0 + _k1 * m)
-        n = m + deltaT_days
-        if not -1 < n < 1:
-            return None  # Bug: this is where we drop some events
-        ra = interpolate_angle3(n, raList)
-        dec = interpolate3(n, decList)
-        H = theta0 - longitude - ra
-#        if H > pi:
-#            H = H - pi2
-        H = diff_angle(0.0, H)
-        A, h = equ_to_horiz(H, dec)
-        dm = (h - h0) / (pi2 * np.cos(dec) * np.cos(latitude) * np.sin(H))
-        m += dm
-        if abs(m - m0) < delta:
-            return jd + m
+    Returns:
+      - Julian Day of the set time, None if there is no set (NaN in an array
+        result, also for the days that do not converge)
 
-    raise Error("bailout")
+    """
+    return _rise_or_set(jd, raList, decList, h0, delta, 1.0, observer)
 
 
-def transit(jd, raList, delta):
+def transit(jd, raList, delta, observer=None):
     """Return the Julian Day of the transit time of an object.
 
     Arguments:
@@ -189,42 +130,400 @@ def transit(jd, raList, delta):
         (jd-1, jd, jd+1)
       - `delta`   : desired accuracy in days.
 
+    Keywords:
+      - `observer` : (Observer, default=None) Observer.from_globals() when
+        None
+
+    For several days at once, `jd` may be an array and each of the three
+    items of `raList` an array of the same shape. The longitude of
+    `observer` may be an array too.
+
     Returns:
-      - Julian Day of the transit time
+      - Julian Day of the transit time, None if the event is dropped (NaN in
+        an array result, also for the days that do not converge)
 
     """
     #
     # future: report both upper and lower culmination, and transits of objects
     # below the horizon
     #
-    longitude = astronomia.globals.longitude
-    THETA0 = sidereal_time_greenwich(jd)
-    deltaT_days = deltaT_seconds(jd) / seconds_per_day
-
-    m = (raList[1] + longitude - THETA0) / pi2
-    if m < 0:
-        m += 1
-    elif m > 1:
-        m -= 1
-    if not 0 <= m <= 1:
+    shape, jd, raList, h0, latitude, longitude = _flatten(jd, raList, 0.0,
+                                                          observer)
+    THETA0 = np.atleast_1d(sidereal_time_greenwich(jd))
+
+    m = _wrap((raList[1] + longitude - THETA0) / pi2)
+    result = _refine(jd, m, raList, None, h0, delta, THETA0, latitude,
+                     longitude, strict=not shape)
+    return _result(result, shape)
+
+
+def rise_set_transit(body, jd, days, delta=1.0/1440, observer=None):
+    """Return the rise, transit and set times of a body over a range of days.
+
+    The apparent coordinates of all the days come from one ephemeris call,
+    at 0 hr dynamical time, and the events of all the days are iterated
+    together. Each day solves twice, starting from its 0 hr and from its
+    noon, so that the events near either end of a day are not dropped, and
+    the events found twice are merged. A day may have no event of a kind,
+    or two when the body crosses 0 hr UT. Near the poles an event may be
+    missing when the iteration does not converge at the edge of the polar
+    day or night.
+
+    Arguments:
+      - `body`  : "Sun", "Moon", or one of ("Mercury", "Venus", "Mars",
+        "Jupiter", "Saturn", "Uranus", "Neptune")
+      - `jd`    : (float) Julian Day of the first day, at 0 hr UT
+      - `days`  : (int) number of days
+
+    Keywords:
+      - `delta`    : (float, default=1/1440) desired accuracy in days
+      - `observer` : (Observer, default=None) Observer.from_globals() when
+        None
+
+    Returns:
+      - rise times : sorted array of Julian Days
+      - transit times : sorted array of Julian Days
+      - set times : sorted array of Julian Days
+
+    """
+    if observer is None:
+        observer = Observer.from_globals()
+    latitude = np.full(days + 2, observer.latitude)
+    longitude = np.full(days + 2, observer.longitude)
+
+    # a day of margin on each side, plus one for the ends of the triples
+    t = jd - 2.0 + np.arange(days + 4)
+    ra, dec, h0 = _apparent_equatorial(body, t)
+    raList = np.array([ra[:-2], ra[1:-1], ra[2:]])
+    decList = np.array([dec[:-2], dec[1:-1], dec[2:]])
+    t, h0 = t[1:-1], h0[1:-1]
+
+    cosH0 = _cos_hour_angle(h0, latitude, decList[1])
+    result = _solve_days(t, raList, decList, h0, cosH0, latitude, longitude,
+                         (-0.5, 0.0), delta, strict=False)
+    return tuple(_distinct(times.ravel(), jd, days) for times in result)
+
+
+#
+# Flags of rise_set_grid() for the days of a site
+#
+rises_and_sets = 0
+circumpolar = 1
+never_rises = 2
+
+
+def rise_set_grid(body, jd, days, observer, delta=1.0/1440):
+    """Return the rise, transit and set times of a body for several sites
+    over a range of days.
+
+    Same method as rise_set_transit(), with one ephemeris call for all the
+    sites and days and the events of all of them iterated together. The
+    days are the local mean solar days of each site, from midnight to
+    midnight, so that the Sun rises, transits and sets once on each day
+    except near the poles. There a few days flagged rises_and_sets may
+    still lack an event, when it falls past local midnight or when the
+    iteration does not converge at the edge of the polar day or night.
+    When a day has two events of one kind, as happens about once a year
+    for a planet, only the first is kept; see rise_set_transit() for all
+    of them.
+
+    Arguments:
+      - `body`     : "Sun", "Moon", or one of ("Mercury", "Venus", "Mars",
+        "Jupiter", "Saturn", "Uranus", "Neptune")
+      - `jd`       : (float) Julian Day of the first day, at 0 hr UT
+      - `days`     : (int) number of days
+      - `observer` : (Observer) the sites, whose latitude and longitude are
+        arrays of the same shape, or scalars for one site
+
+    Keywords:
+      - `delta` : (float, default=1/1440) desired accuracy in days
+
+    Returns:
+      - rise times : Julian Days, array of shape (sites..., days), NaN
+        for the days without a rise
+      - transit times : as above
+      - set times : as above
+      - flags : (int) array of shape (sites..., days), rises_and_sets,
+        circumpolar (always above the horizon), or never_rises, from the
+        declination at local noon
+
+    """
+    sites = np.broadcast(observer.latitude, observer.longitude).shape
+    nsites = int(np.prod(sites))
+    latitude = np.broadcast_to(observer.latitude, sites).ravel()
+    longitude = np.broadcast_to(observer.longitude, sites).ravel()
+
+    # the local days reach up to half a day beyond the UT days
+    t = jd - 2.0 + np.arange(days + 5)
+    ra, dec, h0 = _apparent_equatorial(body, t)
+    raList = np.array([ra[:-2], ra[1:-1], ra[2:]])
+    decList = np.array([dec[:-2], dec[1:-1], dec[2:]])
+    t, h0 = t[1:-1], h0[1:-1]
+    ndays = t.size
+
+    # (sites, days) flattened
+    site = np.repeat(np.arange(nsites), ndays)
+    latitude = latitude[site]
+    longitude = longitude[site]
+    t = np.tile(t, nsites)
+    h0 = np.tile(h0, nsites)
+    raList = np.tile(raList, nsites)
+    decList = np.tile(decList, nsites)
+
+    # local midnight as a fraction of the UT day, within -0.5..0.5 so that
+    # noon stays within the interpolation range; 180 W counts as 180 E
+    midnight = (longitude / pi2 + 0.5) % 1.0 - 0.5
+    noon = midnight + 0.5
+    cosH0 = _cos_hour_angle(h0, latitude, interpolate3(noon, decList))
+    # starting windows in -1..0, the days of margin cover the rest
+    lows = ((midnight % 1.0) - 1.0, ((midnight + 0.5) % 1.0) - 1.0)
+    result = _solve_days(t, raList, decList, h0, cosH0, latitude, longitude,
+                         lows, delta, strict=False)
+
+    grid = []
+    for times in result:
+        values = np.full(nsites*days, np.nan)
+        day = np.floor(times - (jd + midnight))
+        valid = (day >= 0) & (day < days)
+        cell = (site*days + day)[valid].astype(np.int64)
+        times = times[valid]
+        # the first event of each day, when a day has two of one kind
+        order = np.argsort(times, kind="mergesort")
+        cell, first = np.unique(cell[order], return_index=True)
+        values[cell] = times[order][first]
+        grid.append(values.reshape(sites + (days,)))
+
+    cosH0 = cosH0.reshape(nsites, ndays)[:, 1:days + 1]
+    flags = np.where(cosH0 < -1.0, circumpolar,
+                     np.where(cosH0 > 1.0, never_rises, rises_and_sets))
+    grid.append(flags.reshape(sites + (days,)))
+    return tuple(grid)
+
+
+def _cos_hour_angle(h0, latitude, dec):
+    """Return the cosine of the hour angle at which a body of declination
+    `dec` reaches the altitude `h0`, beyond -1..1 when it does not.
+    """
+    return (np.sin(h0) - np.sin(latitude)*np.sin(dec)) / (
+        np.cos(latitude)*np.cos(dec))
+
+
+def _solve_days(t, raList, decList, h0, cosH0, latitude, longitude, lows,
+                delta, strict=True):
+    """Iterate the rise, transit and set times of all the days at once.
+
+    Arguments:
+      - `t`        : 1-D array of Julian Days at 0 hr UT
+      - `raList`   : (3, N) right ascensions
+      - `decList`  : (3, N) declinations
+      - `h0`       : standard altitudes in radians
+      - `cosH0`    : see _cos_hour_angle(), the days beyond -1..1 have
+        no rise and set
+      - `latitude` : latitudes of the observer
+      - `longitude`: longitudes of the observer
+      - `lows`     : starting windows, each day solves from each of them,
+        see _wrap()
+      - `delta`    : desired accuracy in days
+
+    Keywords:
+      - `strict` : see _refine()
+
+    Returns:
+      - rise, transit and set times : (len(lows), N) arrays of Julian
+        Days, NaN for no result
+
+    """
+    THETA0 = np.atleast_1d(sidereal_time_greenwich(t))
+    m0 = (raList[1] + longitude - THETA0) / pi2
+    events = np.flatnonzero(np.abs(cosH0) <= 1.0)
+    H0 = np.acos(cosH0[events])
+
+    result = []
+    for sign in (-1.0, 0.0, 1.0):
+        if sign:
+            idx, m, dec = events, m0[events] + sign * H0 / pi2, \
+                decList[:, events]
+        else:
+            idx, m, dec = np.arange(t.size), m0, None
+        times = np.full((len(lows), t.size), np.nan)
+        for i, low in enumerate(lows):
+            low = np.broadcast_to(low, t.shape)[idx]
+            times[i, idx] = _refine(t[idx], _wrap(m, low), raList[:, idx],
+                                    dec, h0[idx], delta, THETA0[idx],
+                                    latitude[idx], longitude[idx], strict)
+        result.append(times)
+    return result
+
+
+def _apparent_equatorial(body, jd):
+    """Return the apparent right ascensions, declinations and standard
+    altitudes of a body for an array of Julian Days in dynamical time.
+    """
+    deltaPsi, deltaEps = nutation(jd)
+    epsilon = obliquity(jd) + deltaEps
+    if body == "Sun":
+        L, B, R = Sun().dimension3(jd)
+        L, B = vsop_to_fk5(jd, L + deltaPsi + aberration_low(R), B)
+        h0 = np.full(jd.shape, sun_rst_altitude)
+    elif body == "Moon":
+        L, B, R = Lunar().dimension3(jd, deltaPsi)
+        h0 = moon_rst_altitude(R)
+    elif body in planet_names and body != "Earth":
+        ra, dec = geocentric_planet(jd, body, deltaPsi, epsilon, None,
+                                    iterations=3)
+        return ra, dec, np.full(jd.shape, standard_rst_altitude)
+    else:
+        raise Error("unknown body = " + body)
+    ra, dec = ecl_to_equ(L, B, epsilon)
+    return ra, dec, h0
+
+
+def _distinct(times, jd, days):
+    """Return the sorted event times within the `days` from `jd`, once each.
+
+    Events of one kind are about a day apart, so that times closer than
+    0.1 day are the same event found from two starting points. The NaN of
+    the days without a result are dropped.
+    """
+    times = times[np.isfinite(times)]
+    times = np.sort(times[(times >= jd) & (times < jd + days)])
+    return times[np.concatenate(([True], np.diff(times) > 0.1))]
+
+
+def _flatten(jd, raList, h0, observer):
+    """Return the broadcast shape of the days, and the days, the (3, N)
+    coordinates, the standard altitudes and the latitudes and longitudes of
+    the observer as 1-D arrays.
+    """
+    if observer is None:
+        observer = Observer.from_globals()
+    raList = np.asarray(raList, dtype=np.float64)
+    shape = np.broadcast(np.asarray(jd), raList[1], observer.latitude,
+                         observer.longitude).shape
+    jd = np.broadcast_to(jd, shape).ravel().astype(np.float64)
+    raList = _triples(raList, shape)
+    h0 = np.broadcast_to(h0, shape).ravel()
+    latitude = np.broadcast_to(observer.latitude, shape).ravel()
+    longitude = np.broadcast_to(observer.longitude, shape).ravel()
+    return shape, jd, raList, h0, latitude, longitude
+
+
+def _triples(values, shape):
+    """Return the three coordinates of `values` broadcast to `shape`, as a
+    (3, N) array.
+    """
+    values = np.moveaxis(np.asarray(values, dtype=np.float64), 0, -1)
+    return np.moveaxis(np.broadcast_to(values, shape + (3,)), -1, 0).reshape(
+        3, -1)
+
+
+def _result(result, shape):
+    """Return None or a float for a single day, else an array of `shape`"""
+    if not shape:
+        return None if np.isnan(result[0]) else result[0]
+    return result.reshape(shape)
+
+
+def _rise_or_set(jd, raList, decList, h0, delta, sign, observer):
+    """Return the rise (`sign` = -1) or set (`sign` = 1) times"""
+    shape, jd, raList, h0, latitude, longitude = _flatten(jd, raList, h0,
+                                                          observer)
+    decList = _triples(decList, shape)
+    THETA0 = np.atleast_1d(sidereal_time_greenwich(jd))
+
+    cosH0 = (np.sin(h0) - np.sin(latitude)*np.sin(decList[1])) / (
+        np.cos(latitude)*np.cos(decList[1]))
+    #
+    # future: return some indicator when the object is circumpolar or always
+    # below the horizon.
+    #
+    # cosH0 < -1.0: circumpolar
+    # cosH0 > 1.0: never rises
+    #
+    H0 = np.acos(np.clip(cosH0, -1.0, 1.0))
+    m0 = (raList[1] + longitude - THETA0) / pi2
+    m = _wrap(m0 + sign * H0 / pi2)  # the only difference is the sign
+
+    result = np.full(jd.shape, np.nan)
+    events = np.flatnonzero(np.abs(cosH0) <= 1.0)
+    result[events] = _refine(jd[events], m[events], raList[:, events],
+                             decList[:, events], h0[events], delta,
+                             THETA0[events], latitude[events],
+                             longitude[events], strict=not shape)
+    return _result(result, shape)
+
+
+def _wrap(m, low=0.0):
+    """Bring fractions of day into low..low + 1"""
+    return (m - low) % 1.0 + low
+
+
+def _refine(jd, m, raList, decList, h0, delta, THETA0, latitude,
+            longitude, strict=True):
+    """Iterate the times of rise, set (or transit, when `decList` is None)
+    of all the days at once.
+
+    Arguments:
+      - `jd`      : 1-D array of Julian Days at 0 hr UT
+      - `m`       : first approximation of the times, fractions of day
+        within -1..1, see _wrap()
+      - `raList`  : (3, N) right ascensions
+      - `decList` : (3, N) declinations, or None for transits
+      - `h0`      : standard altitudes in radians
+      - `delta`   : desired accuracy in days
+      - `THETA0`  : sidereal time at Greenwich at `jd`
+      - `latitude`  : latitudes of the observer
+      - `longitude` : longitudes of the observer
+
+    Keywords:
+      - `strict` : (bool, default=True) raise Error when some days have not
+        converged after 20 iterations, else leave them NaN
+
+    Returns:
+      - Julian Days of the events, NaN for the dropped ones
+
+    """
+    deltaT_days = np.atleast_1d(deltaT_seconds(jd)) / seconds_per_day
+
+    if np.any((m < -1) | (m > 1)):
         raise Error("m is out of range = " + str(m))
+
+    result = np.full(jd.shape, np.nan)
+    todo = np.arange(jd.size)
     for bailout in range(20):
-        m0 = m
-        theta0 = modpi2(THETA0 + _k1 * m)
-        n = m + deltaT_days
-        if not -1 < n < 1:
-            return None  # Bug: this is where we drop some events
-        ra = interpolate_angle3(n, raList)
-        H = theta0 - longitude - ra
+        m0 = m[todo]
+        theta0 = modpi2(THETA0[todo] + _k1 * m0)
+        n = m0 + deltaT_days[todo]
+        inside = (-1 < n) & (n < 1)
+        # Bug: this is where we drop some events
+        todo, m0, theta0, n = todo[inside], m0[inside], theta0[inside], \
+            n[inside]
+        if not todo.size:
+            return result
+        ra = interpolate_angle3(n, raList[:, todo])
+        H = theta0 - longitude[todo] - ra
 #        if H > pi:
 #            H = H - pi2
         H = diff_angle(0.0, H)
-        dm = -H/pi2
-        m += dm
-        if abs(m - m0) < delta:
-            return jd + m
-
-    raise Error("bailout")
+        if decList is None:
+            dm = -H/pi2
+        else:
+            dec = interpolate3(n, decList[:, todo])
+            lat = latitude[todo]
+            A, h = equ_to_horiz(H, dec, Observer(lat))
+            dm = (h - h0[todo]) / (
+                pi2 * np.cos(dec) * np.cos(lat) * np.sin(H))
+        m1 = m0 + dm
+        m[todo] = m1
+        done = np.abs(m1 - m0) < delta
+        result[todo[done]] = jd[todo[done]] + m1[done]
+        todo = todo[~done]
+        if not todo.size:
+            return result
+
+    if strict:
+        raise Error("bailout")
+    return result
 
 
 def moon_rst_altitude(r):
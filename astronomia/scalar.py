@@ -0,0 +1,335 @@
+"""
+    Copyright 2000, 2001 Astrolabe by William McClain
+
+    Forked in 2013 to Astronomia
+
+    Copyright 2013 Astronomia by Tim Cera
+
+    This file is part of Astronomia.
+
+    Astronomia is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    Astronomia is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Astronomia; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+    """
+
+"""Scalar versions of the most used functions, for one epoch at a time.
+
+The functions of the other modules accept arrays, and for a single epoch
+most of their time goes into np.atleast_1d(), broadcasting and
+_scalar_if_one() rather than into the arithmetic. The functions here take
+and return plain floats and use the math module, so that an interactive
+frame update costs microseconds. The long series (VSOP87d, ELP2000 and
+nutation terms) are still summed with one np.dot() over the packed tables,
+which is faster than a Python loop over the terms.
+
+The results agree with the array functions: exactly for the calendar,
+sidereal time, nutation and the Moon, to 1e-10 radians for the Sun whose
+terms are summed in a different order. See tests/test_scalar.py.
+
+"""
+
+from math import modf, fmod, sin, cos, tan, atan2, asin
+
+import numpy as np
+
+from astronomia.constants import pi2
+from astronomia.util import d_to_r
+from astronomia.commonterms import pL1, pD, pM, pM1, pF, po
+import astronomia.lunar
+import astronomia.nutation
+import astronomia.planets
+
+
+#
+# Calendar
+#
+def cal_to_jd(year, mon=1, day=1, gregorian=True):
+    """Convert a date in the Julian or Gregorian calendars to the Julian Day
+    Number (Meeus 7.1).
+
+    The date is not validated, see calendar.cal_to_jd_unchecked().
+
+    Arguments:
+      - `year` : (int) year
+
+    Keywords:
+      - `mon`       : (int, default=1) month
+      - `day`       : (int, float, default=1) day, may be fractional day
+      - `gregorian` : (bool, default=True) If True, use Gregorian calendar,
+        else use Julian calendar
+
+    Returns:
+      - (float)
+
+    """
+    if mon <= 2:
+        year -= 1
+        mon += 12
+    if gregorian:
+        A = int(year / 100.0)
+        B = 2 - A + int(A / 4.0)
+    else:
+        B = 0
+    return (int(365.25*(year + 4716)) + int(30.6001*(mon + 1)) + day + B -
+            1524.5)
+
+
+def cal_to_jde(year, mon=1, day=1, hour=0, minute=0, sec=0.0,
+               gregorian=True):
+    """Convert a date and time in the Julian or Gregorian calendars to the
+    Julian Day Ephemeris (Meeus 22.1), without validating the date.
+
+    Returns:
+      - julian day ephemeris : (float)
+
+    """
+    return (cal_to_jd(year, mon, day, gregorian) +
+            ((hour / 24.0) + (minute / 1440.0) + (sec / 86400.0)))
+
+
+def jd_to_cal(julian_day, gregorian=True):
+    """Convert a Julian day number to a date in the Julian or Gregorian
+    calendars.
+
+    Arguments:
+      - `julian_day` : (float) Julian Day Number
+
+    Keywords:
+      - `gregorian` : (bool, default=True) If True, use Gregorian calendar,
+        else use Julian calendar
+
+    Return:
+      - (year, month, day) : (tuple) day may be fractional
+
+    """
+    F, Z = modf(julian_day + 0.5)
+    if gregorian:
+        alpha = int((Z - 1867216.25) / 36524.25)
+        A = Z + 1 + alpha - int(alpha / 4.0)
+    else:
+        A = Z
+    B = A + 1524
+    C = int((B - 122.1) / 365.25)
+    D = int(365.25 * C)
+    E = int((B - D) / 30.6001)
+    day = B - D - int(30.6001 * E) + F
+    if E < 14:
+        mon = E - 1
+    else:
+        mon = E - 13
+    if mon > 2:
+        year = C - 4716
+    else:
+        year = C - 4715
+    return year, mon, day
+
+
+def jd_to_jcent(julian_day):
+    """Return the number of Julian centuries since J2000.0"""
+    return (julian_day - 2451545.0) / 36525.0
+
+
+def sidereal_time_greenwich(julian_day, day_fraction=0.0):
+    """Return the mean sidereal time at Greenwich.
+
+    Arguments:
+      - `julian_day` : (float) Julian Day number in Universal Time
+
+    Keywords:
+      - `day_fraction` : (float, default=0.0) days added to `julian_day`
+
+    Returns:
+      - sidereal time in radians : (float) 2pi radians = 24 hours
+
+    """
+    d = (julian_day - 2451545.0) + day_fraction
+    f = fmod(julian_day, 1.0) + fmod(day_fraction, 1.0)
+    T = d / 36525.0
+    T2 = T * T
+    T3 = T2 * T
+    theta0 = 280.46061837 + 360.0*f + \
+        0.98564736629*d + \
+        0.000387933*T2 - \
+        T3/38710000
+    return d_to_r(theta0) % pi2
+
+
+#
+# Nutation and obliquity
+#
+def nutation(jd):
+    """Return the nutation in longitude and in obliquity.
+
+    Arguments:
+      - `jd` : (float) Julian Day in dynamical time
+
+    Returns:
+      - nutation in longitude, in radians
+      - nutation in obliquity, in radians
+
+    """
+    n = astronomia.nutation
+    T = jd_to_jcent(jd)
+    arg = np.dot(n._mult, (pD(T) % pi2, pM(T) % pi2, pM1(T) % pi2,
+                           pF(T) % pi2, po(T) % pi2))
+    sinarg = np.sin(arg)
+    cosarg = np.cos(arg)
+    return (float(np.dot(n._psiK, sinarg) + np.dot(n._psiT, sinarg)*T),
+            float(np.dot(n._epsK, cosarg) + np.dot(n._epsT, cosarg)*T))
+
+
+def obliquity(jd):
+    """Return the mean obliquity of the ecliptic, see nutation.obliquity()"""
+    return astronomia.nutation._pel0(jd_to_jcent(jd))
+
+
+#
+# Sun and Moon
+#
+#
+# Earth's VSOP87d series concatenated in one table per precision: the A, B
+# and C coefficients of every term, with the power of tau and the
+# coordinate (0, 1, 2 for L, B, R) of each.
+#
+_earth = {}
+
+
+def _earth_table(precision):
+    """Return the concatenated Earth series for `precision` in arcseconds"""
+    try:
+        return _earth[precision]
+    except KeyError:
+        pass
+
+    p = astronomia.planets
+    p.VSOP87d()
+    blocks = []
+    powers = []
+    dims = []
+    for i, dim in enumerate(("L", "B", "R")):
+        if precision is None:
+            series = p._series_of("Earth", dim)
+        else:
+            series = p._truncated("Earth", dim, precision*p._arcsec)
+        for power, terms in enumerate(series):
+            blocks.append(terms)
+            powers.append(np.full(terms.shape[1], power))
+            dims.append(np.full(terms.shape[1], i))
+    table = (np.concatenate(blocks, axis=1), np.concatenate(powers),
+             np.concatenate(dims))
+    _earth[precision] = table
+    return table
+
+
+def sun_dimension3(jd, precision=None):
+    """Return geocentric ecliptic longitude, latitude and radius of the Sun.
+
+    Arguments:
+      - `jd` : (float) Julian Day in dynamical time
+
+    Keywords:
+      - `precision` : (float, default=None) acceptable error in
+        arcseconds, see planets.VSOP87d.dimension()
+
+    Returns:
+      - longitude in radians
+      - latitude in radians
+      - radius in au
+
+    """
+    (A, B, C), powers, dims = _earth_table(precision)
+    tau = jd_to_jcent(jd) / 10.0
+    # the VSOP87 series go up to tau**5
+    tauN = tau ** np.arange(6)
+    values = A*np.cos(B + C*tau)*tauN[powers]
+    L, B, R = np.bincount(dims, values, minlength=3)
+    return (float(L) % pi2 + np.pi) % pi2, -float(B), float(R)
+
+
+def moon_dimension3(jd, deltaPsi=None):
+    """Return geocentric ecliptic longitude, latitude and radius of the Moon.
+
+    Arguments:
+      - `jd` : (float) Julian Day in dynamical time
+
+    Keywords:
+      - `deltaPsi` : (default=None) nutation in longitude in radians, if
+        already known for `jd`; computed when None
+
+    Returns:
+      - longitude in radians
+      - latitude in radians
+      - radius in km, Earth's center to Moon's center
+
+    """
+    m = astronomia.lunar
+    T = jd_to_jcent(jd)
+    L1 = pL1(T) % pi2
+    D = pD(T) % pi2
+    M = pM(T) % pi2
+    M1 = pM1(T) % pi2
+    F = pF(T) % pi2
+    A1 = m._pA1(T) % pi2
+    A2 = m._pA2(T) % pi2
+    A3 = m._pA3(T) % pi2
+    E = m._pE(T)
+
+    args = (D, M, M1, F)
+    efac = np.array((1.0, E, E*E))
+    weights = efac[m._eLR]
+    phases = np.dot(m._mLR, args)
+
+    lsum = float(np.dot(m._aL, weights*np.sin(phases)))
+    lsum += 3958*sin(A1) + 1962*sin(L1 - F) + 318*sin(A2)
+
+    bsum = float(np.dot(m._aB, efac[m._eB]*np.sin(np.dot(m._mB, args))))
+    bsum += -2235 * sin(L1) +    \
+        382 * sin(A3) +      \
+        175 * sin(A1 - F) +  \
+        175 * sin(A1 + F) +  \
+        127 * sin(L1 - M1) - \
+        115 * sin(L1 + M1)
+
+    rsum = float(np.dot(m._aR, weights*np.cos(phases)))
+
+    if deltaPsi is None:
+        deltaPsi = nutation(jd)[0]
+    return (L1 + d_to_r(lsum / 1000000) + deltaPsi,
+            d_to_r(bsum / 1000000),
+            385000.56 + rsum / 1000)
+
+
+#
+# Coordinates
+#
+def ecl_to_equ(longitude, latitude, obliquity):
+    """Convert ecliptic to equatorial coordinates.
+
+    [Meeus-1998: equations 13.3, 13.4]
+
+    Arguments:
+      - `longitude` : (float) ecliptic longitude in radians
+      - `latitude`  : (float) ecliptic latitude in radians
+      - `obliquity` : (float) obliquity of the ecliptic in radians
+
+    Returns:
+      - right ascension in radians
+      - declination in radians
+
+    """
+    cose = cos(obliquity)
+    sine = sin(obliquity)
+    sinl = sin(longitude)
+    ra = atan2(sinl*cose - tan(latitude)*sine, cos(longitude))
+    dec = asin(sin(latitude)*cose + cos(latitude)*sine*sinl)
+    return ra % pi2, dec
@@ -28,7 +28,7 @@
 import numpy as np
 
 from astronomia.calendar import jd_to_jcent
-from astronomia.util import polynomial, d_to_r, modpi2, dms_to_d, \
+from astronomia.util import compile_polynomial, d_to_r, modpi2, dms_to_d, \
     _scalar_if_one
 from astronomia.planets import VSOP87d
 
@@ -38,6 +38,32 @@ class Error(Exception):
     pass
 
 
+#
+# Constant terms
+#
+
+# From astrolabe
+#_pMeanLongitude = compile_polynomial((d_to_r(100.466457),
+#                                      d_to_r(36000.7698278),
+#                                      d_to_r(0.00030322),
+#                                      d_to_r(0.000000020)))
+
+# From AA, Naughter
+# Takes T/10.0
+_pMeanLongitude = compile_polynomial((d_to_r(100.4664567),
+                                      d_to_r(360007.6982779),
+                                      d_to_r(0.03032028),
+                                      d_to_r(1.0/49931),
+                                      d_to_r(-1.0/15300),
+                                      d_to_r(-1.0/2000000)))
+
+# in arcseconds, of T + 1
+_pPerigee = compile_polynomial((1012395.0,
+                                6189.03,
+                                1.63,
+                                0.012))
+
+
 class Sun:
     """High precision position calculations.
 
@@ -64,21 +90,7 @@ class Sun:
         jd = np.atleast_1d(jd)
         T = jd_to_jcent(jd)
 
-        # From astrolabe
-        #X = polynomial((d_to_r(100.466457),
-        #                d_to_r(36000.7698278),
-        #                d_to_r(0.00030322),
-        #                d_to_r(0.000000020)), T)
-
-        # From AA, Naughter
-        # Takes T/10.0
-        X = polynomial((d_to_r(100.4664567),
-                        d_to_r(360007.6982779),
-                        d_to_r(0.03032028),
-                        d_to_r(1.0/49931),
-                        d_to_r(-1.0/15300),
-                        d_to_r(-1.0/2000000)), T/10.0)
-
+        X = _pMeanLongitude(T/10.0)
         X = modpi2(X + np.pi)
         return _scalar_if_one(X)
 
@@ -95,50 +107,55 @@ class Sun:
         jd = np.atleast_1d(jd)
         T = jd_to_jcent(jd)
 
-        X = polynomial((1012395.0,
-                        6189.03,
-                        1.63,
-                        0.012), (T + 1))/3600.0
+        X = _pPerigee(T + 1)/3600.0
         X = d_to_r(X)
 
         X = modpi2(X)
         return _scalar_if_one(X)
 
-    def dimension(self, jd, dim):
+    def dimension(self, jd, dim, precision=None):
         """Return one of geocentric ecliptic longitude, latitude and radius.
 
         Arguments:
           - jd : Julian Day in dynamical time
           - dim : one of "L" (longitude) or "B" (latitude) or "R" (radius).
 
+        Keywords:
+          - `precision` : (float, default=None) acceptable error in
+            arcseconds, see VSOP87d.dimension()
+
         Returns:
           - Either longitude in radians, or latitude in radians, or radius in
             au, depending on value of `dim`.
 
         """
         jd = np.atleast_1d(jd)
-        X = self.vsop.dimension(jd, "Earth", dim)
+        X = self.vsop.dimension(jd, "Earth", dim, precision)
         if dim == "L":
             X = modpi2(X + np.pi)
         elif dim == "B":
             X = -X
         return _scalar_if_one(X)
 
-    def dimension3(self, jd):
+    def dimension3(self, jd, precision=None):
         """Return geocentric ecliptic longitude, latitude and radius.
 
         Arguments:
           - `jd` : Julian Day in dynamical time
 
+        Keywords:
+          - `precision` : (float, default=None) acceptable error in
+            arcseconds, see VSOP87d.dimension()
+
         Returns:
           - longitude in radians
           - latitude in radians
           - radius in au
 
         """
-        L = self.dimension(jd, "L")
-        B = self.dimension(jd, "B")
-        R = self.dimension(jd, "R")
+        L = self.dimension(jd, "L", precision)
+        B = self.dimension(jd, "B", precision)
+        R = self.dimension(jd, "R", precision)
         return L, B, R
 
 #
@@ -154,6 +171,10 @@ _kM = (d_to_r(357.5291092),
 _kC = (d_to_r(1.914602),
        d_to_r(-0.004817),
        d_to_r(-0.000014))
+_pL0 = compile_polynomial(_kL0)
+_pM = compile_polynomial(_kM)
+_pC = compile_polynomial(_kC)
+_pEr = compile_polynomial((0.016708634, -0.000042037, -0.0000001267))
 
 _ck3 = d_to_r(0.019993)
 _ck4 = d_to_r(-0.000101)
@@ -176,10 +197,10 @@ def longitude_radius_low(jd):
     """
     jd = np.atleast_1d(jd)
     T = jd_to_jcent(jd)
-    L0 = polynomial(_kL0, T)
-    M = polynomial(_kM, T)
-    er = polynomial((0.016708634, -0.000042037, -0.0000001267), T)
-    C = polynomial(_kC, T) * np.sin(M) \
+    L0 = _pL0(T)
+    M = _pM(T)
+    er = _pEr(T)
+    C = _pC(T) * np.sin(M) \
         + (_ck3 - _ck4 * T) * np.sin(2 * M) \
         + _ck5 * np.sin(3 * M)
     L = modpi2(L0 + C)
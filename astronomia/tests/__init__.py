@@ -0,0 +1,24 @@
+"""
+    Copyright 2000, 2001 Astrolabe by William McClain
+
+    Forked in 2013 to Astronomia
+
+    Copyright 2013 Astronomia by Tim Cera
+
+    This file is part of Astronomia.
+
+    Astronomia is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    Astronomia is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Astronomia; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+    """
+"""Tests of astronomia"""
@@ -0,0 +1,53 @@
+"""
+    Copyright 2000, 2001 Astrolabe by William McClain
+
+    Forked in 2013 to Astronomia
+
+    Copyright 2013 Astronomia by Tim Cera
+
+    This file is part of Astronomia.
+
+    Astronomia is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    Astronomia is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Astronomia; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+    """
+"""Tests of the nutation cache"""
+
+import threading
+
+import numpy as np
+
+from astronomia import nutation
+
+
+def test_cache_threads():
+    # more epochs than the cache holds, so that it is cleared while the
+    # other threads read it
+    jds = 2451545.0 + np.arange(4*nutation._cache_size)
+    expected = [nutation.nutation(jd, cache=False) for jd in jds]
+    errors = []
+
+    def work():
+        try:
+            for repeat in range(50):
+                for jd, value in zip(jds, expected):
+                    assert nutation.nutation(jd) == value
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
@@ -0,0 +1,60 @@
+"""
+    Copyright 2000, 2001 Astrolabe by William McClain
+
+    Forked in 2013 to Astronomia
+
+    Copyright 2013 Astronomia by Tim Cera
+
+    This file is part of Astronomia.
+
+    Astronomia is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    Astronomia is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Astronomia; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+    """
+"""Tests of the VSOP87d databases and planet positions"""
+
+import numpy as np
+from numpy.testing import assert_array_equal
+
+import pytest
+
+from astronomia import planets
+
+JDS = np.array([2448976.5, 2451545.0, 2460000.5])
+
+
+def test_binary_db_before_first_instance(tmp_path, monkeypatch):
+    path = str(tmp_path / "vsop87d.bin")
+    planets.write_vsop87d_binary_db(path)
+    planets.load_vsop87d_text_db()
+    text = planets.VSOP87d().dimension3(JDS, "Mars")
+
+    # as if VSOP87d() had never been called
+    monkeypatch.setattr(planets, "_first_time", True)
+    try:
+        planets.load_vsop87d_binary_db(path)
+        vsop = planets.VSOP87d()
+        assert planets._binary_db is not None
+        assert_array_equal(vsop.dimension3(JDS, "Mars"), text)
+    finally:
+        planets.load_vsop87d_text_db()
+
+
+def test_geocentric_planet_iterations():
+    for iterations in (0, -1):
+        with pytest.raises(planets.Error):
+            planets.geocentric_planet(JDS, "Mars", 0.0, 0.4, None,
+                                      iterations=iterations)
+    ra, dec = planets.geocentric_planet(JDS, "Mars", 0.0, 0.4, None,
+                                        iterations=1)
+    assert np.all(np.isfinite(ra)) and np.all(np.isfinite(dec))
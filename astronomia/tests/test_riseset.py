@@ -0,0 +1,100 @@
+"""
+    Copyright 2000, 2001 Astrolabe by William McClain
+
+    Forked in 2013 to Astronomia
+
+    Copyright 2013 Astronomia by Tim Cera
+
+    This file is part of Astronomia.
+
+    Astronomia is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    Astronomia is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Astronomia; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+    """
+"""Tests of the rise, set and transit times over ranges of days"""
+
+import numpy as np
+
+import pytest
+
+from astronomia import riseset
+from astronomia.observer import Observer
+from astronomia.util import d_to_r
+
+JD = 2451545.5
+
+TROMSO = Observer(d_to_r(69.65), d_to_r(-18.96))
+REYKJAVIK = Observer(d_to_r(64.15), d_to_r(21.94))
+
+
+@pytest.mark.parametrize("body,observer", [
+    ("Sun", TROMSO), ("Moon", TROMSO), ("Moon", REYKJAVIK),
+    ("Sun", Observer(d_to_r(-70.0), 0.0))])
+def test_rise_set_transit_high_latitude(body, observer):
+    # some days do not converge at the edge of the polar day or night, they
+    # must not lose the rest of the year
+    rises, transits, sets = riseset.rise_set_transit(body, JD, 365,
+                                                     observer=observer)
+    for times in (rises, transits, sets):
+        assert np.all(np.isfinite(times))
+        assert np.all((times >= JD) & (times < JD + 365))
+        assert np.all(np.diff(times) > 0.5)
+    assert 200 < len(rises) < 365
+    assert 200 < len(sets) < 365
+    assert len(transits) >= 340
+
+
+def test_rise_set_transit_high_latitude_scalar():
+    # the days where the single day rise() converges agree with the range
+    observer = TROMSO
+    rises = riseset.rise_set_transit("Sun", JD, 365, observer=observer)[0]
+    t = JD - 1.0 + np.arange(367)
+    ra, dec, h0 = riseset._apparent_equatorial("Sun", t)
+    single = riseset.rise(t[1:-1], (ra[:-2], ra[1:-1], ra[2:]),
+                          (dec[:-2], dec[1:-1], dec[2:]), h0[1:-1],
+                          1.0/1440, observer)
+    single = single[np.isfinite(single)]
+    nearest = np.abs(single[:, None] - rises[None, :]).min(axis=1)
+    assert np.all(nearest < 1.0/1440)
+
+
+def test_rise_set_grid_date_line():
+    # the longitudes at the date line are valid, the times of each day fall
+    # within the local day of the site
+    longitude = d_to_r(np.array([179.9, 180.0, -180.0, -179.9]))
+    observer = Observer(d_to_r(40.0), longitude)
+    rises, transits, sets, flags = riseset.rise_set_grid("Sun", JD, 30,
+                                                         observer)
+    assert np.all(flags == riseset.rises_and_sets)
+    midnight = (longitude / (2*np.pi) + 0.5) % 1.0 - 0.5
+    day = np.arange(30)
+    for times in (rises, transits, sets):
+        assert np.all(np.isfinite(times))
+        local = times - (JD + midnight[:, None]) - day
+        assert np.all((local >= 0.0) & (local < 1.0))
+    for times in (rises, transits, sets):
+        assert np.all(times[1] == times[2])
+
+
+def test_rise_set_grid_first_event_of_day():
+    # the events of a planet come about 4 minutes earlier each day, so that
+    # once a year a day has two of them; the grid keeps the first
+    observer = Observer(d_to_r(40.0), 0.0)
+    events = riseset.rise_set_transit("Saturn", JD, 400, observer=observer)
+    grid = riseset.rise_set_grid("Saturn", JD, 400, observer)
+    for times, values in zip(events, grid):
+        day = np.floor(times - JD).astype(np.int64)
+        assert len(times) > len(np.unique(day))
+        first = np.full(400, np.nan)
+        first[day[::-1]] = times[::-1]
+        np.testing.assert_allclose(values, first, rtol=0, atol=1.0/86400)
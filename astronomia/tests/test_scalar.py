@@ -0,0 +1,101 @@
+"""
+    Copyright 2000, 2001 Astrolabe by William McClain
+
+    Forked in 2013 to Astronomia
+
+    Copyright 2013 Astronomia by Tim Cera
+
+    This file is part of Astronomia.
+
+    Astronomia is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    Astronomia is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Astronomia; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+    """
+"""The plain-float functions of astronomia.scalar agree with the array
+functions of the other modules.
+"""
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+import pytest
+
+from astronomia import calendar, coordinates, nutation, scalar
+from astronomia.lunar import Lunar
+from astronomia.sun import Sun
+
+# Julian Days in dynamical time spread over -1000..3000
+JDS = np.linspace(1355818.5, 2816788.5, 37) + 0.123456
+
+DATES = [(-1000, 3, 1.5), (-4712, 1, 1.5), (1582, 10, 15.0),
+         (1957, 10, 4.81), (2000, 1, 1.5), (2999, 12, 30.75)]
+
+
+def _assert_close(scalars, arrays, atol=0.0):
+    """Assert that the float results are equal, or within `atol`"""
+    assert len(scalars) == len(arrays)
+    for s, a in zip(scalars, arrays):
+        assert isinstance(s, float)
+        assert_allclose(s, a, rtol=0, atol=atol)
+
+
+@pytest.mark.parametrize("gregorian", [True, False])
+def test_calendar(gregorian):
+    for year, mon, day in DATES:
+        jd = scalar.cal_to_jd(year, mon, day, gregorian)
+        assert jd == calendar.cal_to_jd(year, mon, day, gregorian)
+        jde = scalar.cal_to_jde(year, mon, int(day), 6, 30, 15.5, gregorian)
+        assert jde == calendar.cal_to_jde(year, mon, int(day), 6, 30, 15.5,
+                                          gregorian)
+    for jd in JDS:
+        assert scalar.jd_to_cal(jd, gregorian) == tuple(
+            calendar.jd_to_cal(jd, gregorian))
+
+
+def test_time():
+    for jd in JDS:
+        assert scalar.jd_to_jcent(jd) == calendar.jd_to_jcent(jd)
+        assert scalar.sidereal_time_greenwich(jd) == \
+            calendar.sidereal_time_greenwich(jd)
+        assert scalar.sidereal_time_greenwich(jd, 0.3) == \
+            calendar.sidereal_time_greenwich(jd, 0.3)
+
+
+def test_nutation():
+    for jd in JDS:
+        _assert_close(scalar.nutation(jd), nutation.nutation(jd, cache=False))
+        assert scalar.obliquity(jd) == nutation.obliquity(jd)
+
+
+@pytest.mark.parametrize("precision", [None, 1.0])
+def test_sun(precision):
+    # the terms are summed in a different order
+    sun = Sun()
+    for jd in JDS:
+        _assert_close(scalar.sun_dimension3(jd, precision),
+                      sun.dimension3(jd, precision), atol=1e-10)
+
+
+def test_moon():
+    moon = Lunar()
+    for jd in JDS:
+        _assert_close(scalar.moon_dimension3(jd), moon.dimension3(jd))
+        _assert_close(scalar.moon_dimension3(jd, 1e-5),
+                      moon.dimension3(jd, 1e-5))
+
+
+def test_ecl_to_equ():
+    for a, b, e in zip(np.linspace(0.0, 6.28, 13), np.linspace(-1.5, 1.5, 13),
+                       np.linspace(0.40, 0.41, 13)):
+        _assert_close(scalar.ecl_to_equ(a, b, e),
+                      coordinates.ecl_to_equ(a, b, e), atol=1e-15)
@@ -0,0 +1,367 @@
+"""
+    Copyright 2000, 2001 Astrolabe by William McClain
+
+    Forked in 2013 to Astronomia
+
+    Copyright 2013 Astronomia by Tim Cera
+
+    This file is part of Astronomia.
+
+    Astronomia is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    Astronomia is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Astronomia; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+    """
+"""Scalar and array calls of the same functions must agree.
+
+Each test calls a function once per element with Python scalars and once
+with the whole array, and compares the results element by element.
+
+"""
+
+import numpy as np
+from numpy.testing import assert_array_equal, assert_allclose
+
+import pytest
+
+from astronomia import calendar, chebyshev, coordinates, dynamical, \
+    equinox, nutation, planets, riseset, sun, util
+from astronomia.lunar import Lunar
+from astronomia.observer import Observer
+from astronomia.riseset import _apparent_equatorial
+
+# Julian Days in dynamical time spread over -1000..3000
+JDS = np.linspace(1355818.5, 2816788.5, 37) + 0.123456
+
+
+def _each(f, *args):
+    """Return the results of f for each element of args, as arrays"""
+    results = [f(*[float(a[i]) if np.ndim(a) else a for a in args])
+               for i in range(len(args[0]))]
+    if isinstance(results[0], tuple):
+        return tuple(np.array(r) for r in zip(*results))
+    return np.array(results)
+
+
+def _assert_same(scalars, arrays, atol=0.0):
+    """Assert that the results are equal, or within `atol` for the series
+    whose dot products sum in a different order for arrays
+    """
+    if not isinstance(scalars, tuple):
+        scalars, arrays = (scalars,), (arrays,)
+    assert len(scalars) == len(arrays)
+    for s, a in zip(scalars, arrays):
+        assert np.shape(a) == np.shape(s)
+        if atol:
+            assert_allclose(a, s, rtol=0, atol=atol)
+        else:
+            assert_array_equal(a, s)
+
+
+#
+# util
+#
+
+def test_d_to_dms():
+    x = np.array([-181.5, -0.25, -0.0001, 0.0, 12.345678, 359.99999])
+    _assert_same(_each(util.d_to_dms, x), util.d_to_dms(x))
+
+
+def test_dms_to_d():
+    deg = np.array([-12, 0, 0, 12, 359])
+    minute = np.array([30, -15, 0, 59, 0])
+    sec = np.array([1.5, 0.0, -30.0, 59.9, 0.0])
+    _assert_same(_each(util.dms_to_d, deg, minute, sec),
+                 util.dms_to_d(deg, minute, sec))
+
+
+def test_diff_angle():
+    a = np.linspace(0.0, 2*np.pi, 11)
+    b = a[::-1] * 0.7
+    _assert_same(_each(util.diff_angle, a, b), util.diff_angle(a, b))
+
+
+def test_interpolate3():
+    n = np.linspace(-0.9, 0.9, 7)
+    y = (1.0, 1.5, 1.7)
+    _assert_same(_each(lambda n: util.interpolate3(n, y), n),
+                 util.interpolate3(n, y))
+    _assert_same(_each(lambda n: util.interpolate_angle3(n, (6.2, 0.1, 0.3)),
+                       n),
+                 util.interpolate_angle3(n, (6.2, 0.1, 0.3)))
+
+
+def test_interpolate3_out_of_range():
+    with pytest.raises(util.Error):
+        util.interpolate3(np.array([0.0, 1.0]), (1.0, 2.0, 3.0))
+
+
+#
+# calendar
+#
+
+def test_jd_to_cal():
+    _assert_same(_each(calendar.jd_to_cal, JDS), calendar.jd_to_cal(JDS))
+    _assert_same(_each(lambda jd: calendar.jd_to_cal(jd, False), JDS),
+                 calendar.jd_to_cal(JDS, False))
+
+
+def test_day_numbers():
+    days = np.arange(-34000000, 38000000, 987654, dtype=np.int64)
+    _assert_same(_each(calendar.day_number_to_cal, days),
+                 calendar.day_number_to_cal(days))
+    year, mon, day = calendar.day_number_to_cal(days)
+    assert_array_equal(calendar.cal_to_day_number(year, mon, day), days)
+    _assert_same(_each(calendar.jd_to_day_number, JDS),
+                 calendar.jd_to_day_number(JDS))
+
+
+def test_fday_hms():
+    fday = np.linspace(0.0, 0.999, 13)
+    _assert_same(_each(calendar.fday_to_hms, fday),
+                 calendar.fday_to_hms(fday))
+    hr, mn, sec = calendar.fday_to_hms(fday)
+    _assert_same(_each(calendar.hms_to_fday, hr, mn, sec),
+                 calendar.hms_to_fday(hr, mn, sec))
+
+
+def test_day_of_week_and_leap_year():
+    _assert_same(_each(calendar.jd_to_day_of_week, JDS),
+                 calendar.jd_to_day_of_week(JDS))
+    years = np.arange(-1000, 3001, 97)
+    _assert_same(_each(calendar.is_leap_year, years),
+                 calendar.is_leap_year(years))
+    _assert_same(_each(lambda y: calendar.is_leap_year(y, False), years),
+                 calendar.is_leap_year(years, False))
+
+
+def test_lt_to_str():
+    for level in ("day", "hour", "minute", "second"):
+        _assert_same(_each(lambda jd: calendar.lt_to_str(jd, "UT", level),
+                           JDS),
+                     calendar.lt_to_str(JDS, "UT", level))
+    zones = np.array(["EST", "EDT"] * 18 + ["EST"])
+    assert_array_equal(calendar.lt_to_str(JDS, zones),
+                       [calendar.lt_to_str(jd, zone)
+                        for jd, zone in zip(JDS, zones)])
+    assert calendar.lt_to_str(JDS.reshape(37, 1)).shape == (37, 1)
+
+
+def test_sidereal_time():
+    for f in (calendar.sidereal_time_greenwich,
+              calendar.sidereal_time_greenwich_apparent,
+              calendar.earth_rotation_angle):
+        _assert_same(_each(f, JDS), f(JDS))
+
+
+#
+# nutation
+#
+
+def test_nutation():
+    # the matrix products of the array path may round differently
+    assert_allclose(nutation.nutation(JDS),
+                    _each(lambda jd: nutation.nutation(jd, cache=False), JDS),
+                    rtol=1e-14, atol=0)
+    for f in (nutation.nutation_in_longitude, nutation.nutation_in_obliquity,
+              nutation.obliquity, nutation.obliquity_hi):
+        assert_allclose(f(JDS), _each(f, JDS), rtol=0, atol=1e-15)
+
+
+#
+# lunar
+#
+
+def test_lunar():
+    moon = Lunar()
+    assert_allclose(moon.dimension3(JDS), _each(moon.dimension3, JDS),
+                    rtol=1e-15, atol=1e-15)
+    for dim in "LBR":
+        assert_allclose(moon.dimension(JDS, dim),
+                        _each(lambda jd: moon.dimension(jd, dim), JDS),
+                        rtol=1e-15, atol=1e-15)
+
+
+#
+# sun
+#
+
+def test_sun():
+    body = sun.Sun()
+    _assert_same(_each(body.dimension3, JDS), body.dimension3(JDS),
+                 atol=1e-10)
+    _assert_same(_each(body.mean_longitude, JDS), body.mean_longitude(JDS))
+    _assert_same(_each(body.mean_longitude_perigee, JDS),
+                 body.mean_longitude_perigee(JDS))
+    _assert_same(_each(sun.longitude_radius_low, JDS),
+                 sun.longitude_radius_low(JDS))
+    L = np.linspace(0.0, 6.28, JDS.size)
+    _assert_same(_each(sun.apparent_longitude_low, JDS, L),
+                 sun.apparent_longitude_low(JDS, L))
+
+
+#
+# planets
+#
+
+@pytest.mark.parametrize("planet", planets.planet_names)
+def test_vsop87d(planet):
+    vsop = planets.VSOP87d()
+    _assert_same(_each(lambda jd: vsop.dimension3(jd, planet), JDS),
+                 vsop.dimension3(JDS, planet), atol=1e-10)
+    for dim in "LBR":
+        _assert_same(_each(lambda jd: vsop.dimension(jd, planet, dim), JDS),
+                     vsop.dimension(JDS, planet, dim), atol=1e-10)
+
+
+def test_vsop_to_fk5():
+    L = np.linspace(0.0, 6.28, JDS.size)
+    B = np.linspace(-0.1, 0.1, JDS.size)
+    _assert_same(_each(planets.vsop_to_fk5, JDS, L, B),
+                 planets.vsop_to_fk5(JDS, L, B))
+
+
+@pytest.mark.parametrize("iterations", [None, 3])
+def test_geocentric_planet(iterations):
+    deltaPsi, deltaEps = nutation.nutation(JDS)
+    epsilon = nutation.obliquity(JDS) + deltaEps
+
+    def f(jd, deltaPsi, epsilon):
+        return planets.geocentric_planet(jd, "Mars", deltaPsi, epsilon,
+                                         1.0/86400, iterations)
+    _assert_same(_each(f, JDS, deltaPsi, epsilon), f(JDS, deltaPsi, epsilon),
+                 atol=1e-10)
+
+
+#
+# dynamical
+#
+
+def test_dynamical():
+    # the table, the formulas of each era and their bridges
+    jds = np.concatenate((JDS, calendar.cal_to_jd(
+        np.array([1620, 1700, 1900, 1999, 2005, 2015, 2049, 2051, 2149, 2151,
+                  2500]), 6, 1)))
+    _assert_same(_each(dynamical.deltaT_seconds, jds),
+                 dynamical.deltaT_seconds(jds))
+    _assert_same(_each(dynamical.dt_to_ut, jds), dynamical.dt_to_ut(jds))
+
+
+#
+# equinox
+#
+
+def test_equinox():
+    years = np.arange(-1000, 3001, 250)
+    for season in ("spring", "summer", "autumn", "winter"):
+        approx = equinox.equinox_approx(years, season)
+        _assert_same(_each(lambda y: equinox.equinox_approx(y, season),
+                           years),
+                     approx, atol=1e-8)
+        _assert_same(_each(lambda jd: equinox.equinox(jd, season, 1e-6),
+                           approx),
+                     equinox.equinox(approx, season, 1e-6), atol=1e-8)
+
+
+#
+# coordinates
+#
+
+def test_coordinates():
+    a = np.linspace(0.0, 6.28, 13)
+    b = np.linspace(-1.5, 1.5, 13)
+    e = np.linspace(0.40, 0.41, 13)
+    _assert_same(_each(coordinates.ecl_to_equ, a, b, e),
+                 coordinates.ecl_to_equ(a, b, e))
+    _assert_same(_each(coordinates.equ_to_ecl, a, b, e),
+                 coordinates.equ_to_ecl(a, b, e))
+    _assert_same(_each(coordinates.ell_to_geo, b, a, e*1000),
+                 coordinates.ell_to_geo(b, a, e*1000))
+
+    def horiz(H, decl, latitude):
+        return coordinates.equ_to_horiz(H, decl, Observer(latitude))
+    _assert_same(_each(horiz, a, b, b[::-1]), horiz(a, b, b[::-1]))
+
+
+#
+# chebyshev
+#
+
+def test_chebyshev():
+    ephemeris = chebyshev.fit("Mars", 2451545.0, 2451645.0, 1e-9)
+    jds = np.linspace(2451545.0, 2451645.0, 23)
+    _assert_same(_each(ephemeris.dimension3, jds),
+                 ephemeris.dimension3(jds))
+    for f in (ephemeris.position, ephemeris.velocity):
+        assert_array_equal(f(jds), _each(f, jds).T)
+        assert f(jds[0]).shape == (3,)
+
+
+#
+# riseset
+#
+
+def _days(body, jd, days):
+    """Return the days at 0 hr UT and the coordinates for rise() and
+    settime()
+    """
+    t = jd - 1.0 + np.arange(days + 2)
+    ra, dec, h0 = _apparent_equatorial(body, t)
+    raList = (ra[:-2], ra[1:-1], ra[2:])
+    decList = (dec[:-2], dec[1:-1], dec[2:])
+    return t[1:-1], raList, decList, h0[1:-1]
+
+
+def _scalar_events(f, jd, *args):
+    """Return the events of f for each day, NaN for None or a bailout"""
+    result = np.full(len(jd), np.nan)
+    for i in range(len(jd)):
+        lists = [a if np.ndim(a) == 0 else
+                 (tuple(float(x[i]) for x in a) if isinstance(a, tuple)
+                  else float(a[i])) for a in args[:-1]]
+        try:
+            event = f(float(jd[i]), *lists, observer=args[-1])
+        except riseset.Error:
+            continue
+        if event is not None:
+            result[i] = event
+    return result
+
+
+@pytest.mark.parametrize("body,latitude", [
+    ("Sun", 42.3333), ("Sun", 70.0), ("Moon", 42.3333), ("Moon", 64.1),
+    ("Venus", 42.3333)])
+def test_riseset(body, latitude):
+    observer = Observer(util.d_to_r(latitude), util.d_to_r(71.0833))
+    jd, raList, decList, h0 = _days(body, 2451545.5, 366)
+    delta = 1.0 / 1440
+    for f in (riseset.rise, riseset.settime):
+        _assert_same(
+            _scalar_events(f, jd, raList, decList, h0, delta, observer),
+            f(jd, raList, decList, h0, delta, observer))
+    _assert_same(
+        _scalar_events(riseset.transit, jd, raList, delta, observer),
+        riseset.transit(jd, raList, delta, observer))
+
+
+def test_riseset_bailout():
+    # the Sun barely rises at 70 degrees north around 1 December 2000, where
+    # the iteration does not converge
+    observer = Observer(util.d_to_r(70.0), util.d_to_r(-20.0))
+    jd, raList, decList, h0 = _days("Sun", 2451873.5, 1)
+    with pytest.raises(riseset.Error):
+        riseset.rise(jd[0], [x[0] for x in raList], [x[0] for x in decList],
+                     h0[0], 1.0/1440, observer)
+    jd, raList, decList, h0 = _days("Sun", 2451865.5, 10)
+    times = riseset.rise(jd, raList, decList, h0, 1.0/1440, observer)
+    assert np.isnan(times[8])
+    assert np.all(np.isfinite(times[:8]))
@@ -61,7 +61,7 @@ def d_to_dms(x):
         If minutes is 0, seconds will be negative.
 
     Arguments:
-      - `x` : degrees
+      - `x` : degrees, scalar or array
 
     Returns:
       - degrees : (int)
@@ -69,9 +69,11 @@ def d_to_dms(x):
       - seconds : (int, float)
 
     """
-    frac, degrees = np.modf(x)
+    frac, degrees = np.modf(np.atleast_1d(x))
     seconds, minutes = np.modf(frac*60)
-    return int(degrees), int(minutes), seconds*60
+    return (_scalar_if_one(degrees.astype(np.int64)),
+            _scalar_if_one(minutes.astype(np.int64)),
+            _scalar_if_one(seconds*60))
 
 
 #
@@ -104,20 +106,18 @@ def diff_angle(a, b):
         359 degress... 0 degrees... 1 degree... etc
 
     Arguments:
-      - `a` : (int, float) first angle, in radians
-      - `b` : (int, float) second angle, in radians
+      - `a` : (int, float, array) first angle, in radians
+      - `b` : (int, float, array) second angle, in radians
 
     Returns:
-      - b - a, in radians : (int, float)
+      - b - a, in radians : (int, float, array)
 
     """
-    if b < a:
-        result = b + pi2 - a
-    else:
-        result = b - a
-    if result > np.pi:
-        result -= pi2
-    return result
+    a = np.asarray(a)
+    b = np.asarray(b)
+    result = np.where(b < a, b + pi2 - a, b - a)
+    result = np.where(result > np.pi, result - pi2, result)
+    return _scalar_if_one(result)
 
 
 def dms_to_d(deg, minute, sec):
@@ -126,12 +126,12 @@ def dms_to_d(deg, minute, sec):
     If any of the components are negative the result will also be negative.
 
     Arguments:
-      - `deg` : (int, float) degrees
-      - `minute` : (int, float) minutes
-      - `sec` : (int, float) seconds
+      - `deg` : (int, float, array) degrees
+      - `minute` : (int, float, array) minutes
+      - `sec` : (int, float, array) seconds
 
     Returns:
-      - decimal degrees : (float)
+      - decimal degrees : (float, array)
 
     """
     deg = np.atleast_1d(deg)
@@ -139,9 +139,15 @@ def dms_to_d(deg, minute, sec):
     sec = np.atleast_1d(sec)
     deg, minute, sec = np.broadcast_arrays(deg, minute, sec)
     result = abs(deg) + abs(minute)/60.0 + abs(sec)/3600.0
-    if deg < 0 or minute < 0 or sec < 0:
-        result = -result
-    return _scalar_if_one(result)
+    negative = (deg < 0) | (minute < 0) | (sec < 0)
+    return _scalar_if_one(np.where(negative, -result, result))
+
+
+def _check_interpolating_factor(n):
+    """Raise Error unless every interpolating factor is in -1..1"""
+    n = np.asarray(n)
+    if not np.all((n > -1) & (n < 1)):
+        raise Error("interpolating factor out of range: " + str(n))
 
 
 def interpolate3(n, y):
@@ -150,15 +156,16 @@ def interpolate3(n, y):
     [Meeus-1998; equation 3.3]
 
     Parameters:
-      - `n` : the interpolating factor, must be between -1 and 1
-      - `y` : a sequence of three values
+      - `n` : the interpolating factor, must be between -1 and 1; scalar
+        or array
+      - `y` : a sequence of three values, or of three arrays broadcasting
+        with `n`
 
     Results:
       - the interpolated value of y
 
     """
-    if not -1 < n < 1:
-        raise Error("interpolating factor out of range: " + str(n))
+    _check_interpolating_factor(n)
 
     a = y[1] - y[0]
     b = y[2] - y[1]
@@ -176,15 +183,16 @@ def interpolate_angle3(n, y):
     for example: 359 degrees...0 degrees...1 degree.
 
     Arguments:
-      - `n` : the interpolating factor, must be between -1 and 1
-      - `y` : a sequence of three values
+      - `n` : the interpolating factor, must be between -1 and 1; scalar
+        or array
+      - `y` : a sequence of three values, or of three arrays broadcasting
+        with `n`
 
     Results:
       - the interpolated value of y
 
     """
-    if not -1 < n < 1:
-        raise Error("interpolating factor out of range: " + str(n))
+    _check_interpolating_factor(n)
 
     a = diff_angle(y[0], y[1])
     b = diff_angle(y[1], y[2])
@@ -326,6 +334,9 @@ def polynomial(terms, x):
 
     Where: terms[0] is constant, terms[1] is for x, terms[2] is for x^2, etc.
 
+    For coefficients known in advance, compile_polynomial() avoids
+    converting them on every call.
+
     Arguments:
       - `terms` : sequence of coefficients
       - `x` : variable value
@@ -342,8 +353,48 @@ def polynomial(terms, x):
 
             1.1 + 2.2 * t + 3.3 * t^2 + 4.4 * t^3
     """
-    apolyfunc = np.polynomial.Polynomial(terms)
-    return apolyfunc(x)
+    return compile_polynomial(terms)(x)
+
+
+def compile_polynomial(terms):
+    """Return a function evaluating a polynomial with fixed coefficients.
+
+    The coefficients are converted once; each evaluation is then Horner's
+    rule, with plain float arithmetic for a scalar and in-place operations
+    for an array.
+
+    Arguments:
+      - `terms` : sequence of coefficients, terms[0] is constant, terms[1]
+        is for x, etc.
+
+    Returns:
+      - function of `x`, scalar or array, returning the value of the
+        polynomial
+
+    Examples:
+        >>> p = compile_polynomial((1.1, -3.2, 3.3, 4.5))
+        >>> p(4.1)
+        353.59749999999997
+
+    """
+    rterms = tuple(float(term) for term in reversed(terms))
+    first = rterms[0]
+    rest = rterms[1:]
+
+    def evaluate(x):
+        if isinstance(x, (float, int)):
+            result = first
+            for term in rest:
+                result = result*x + term
+            return result
+        x = np.asarray(x)
+        result = np.full(x.shape, first)
+        for term in rest:
+            result *= x
+            result += term
+        return result
+
+    return evaluate
 
 #
 # Local constants
@@ -0,0 +1,131 @@
+"""
+    Copyright 2000, 2001 Astrolabe by William McClain
+
+    Forked in 2013 to Astronomia
+
+    Copyright 2013 Astronomia by Tim Cera
+
+    This file is part of Astronomia.
+
+    Astronomia is free software; you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation; either version 2 of the License, or
+    (at your option) any later version.
+
+    Astronomia is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with Astronomia; if not, write to the Free Software
+    Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+    """
+
+"""Micro-benchmarks of the call paths that the optimizations changed.
+
+The same calls are timed on whichever source tree is given, so that the
+old and new call paths are compared by running the script on a checkout
+of the commit before a change and on the current tree:
+
+    git worktree add /tmp/before <commit>^
+    python benchmarks/benchmark.py --tree /tmp/before vsop87d
+    python benchmarks/benchmark.py vsop87d
+
+Each line is the best of 5 repeats, as the time per call.
+
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+_groups = {}
+
+
+def group(function):
+    """Register a benchmark group under the name of its function"""
+    _groups[function.__name__] = function
+    return function
+
+
+def report(name, f, number):
+    """Print the best time per call of f() over 5 repeats of `number`"""
+    f()  # warm up: lazy loading, caches of the tables
+    best = min(timeit.repeat(f, number=number, repeat=5)) / number
+    if best < 1e-3:
+        print("  %-32s %9.1f us" % (name, best*1e6))
+    else:
+        print("  %-32s %9.2f ms" % (name, best*1e3))
+
+
+@group
+def vsop87d():
+    """VSOP87d.dimension3 of the eight planets at one epoch"""
+    from astronomia.planets import VSOP87d, planet_names
+
+    vsop = VSOP87d()
+
+    def all_planets():
+        for planet in planet_names:
+            vsop.dimension3(2451545.0, planet)
+
+    for planet in planet_names:
+        vsop.dimension3(2451545.0, planet)
+    report("dimension3, eight planets", all_planets, 20)
+
+
+@group
+def polynomial():
+    """fixed polynomials and the positions built on them, at one epoch"""
+    import numpy as np
+    from astronomia import equinox, nutation, sun, util
+    from astronomia.commonterms import kL1
+    from astronomia.lunar import Lunar
+
+    jd = 2451545.0
+    T = 0.123
+    values = np.linspace(-1.0, 1.0, 1000)
+    if hasattr(nutation, "nutation"):
+        def nutation_uncached():
+            nutation.nutation(jd, cache=False)
+    else:
+        def nutation_uncached():
+            nutation.nutation_in_longitude(jd)
+            nutation.nutation_in_obliquity(jd)
+    moon = Lunar()
+
+    report("polynomial(kL1), scalar", lambda: util.polynomial(kL1, T), 10000)
+    report("polynomial(kL1), 1000 values",
+           lambda: util.polynomial(kL1, values), 1000)
+    report("Lunar.dimension3", lambda: moon.dimension3(jd), 1000)
+    report("nutation, uncached", nutation_uncached, 1000)
+    report("obliquity", lambda: nutation.obliquity(jd), 10000)
+    report("longitude_radius_low", lambda: sun.longitude_radius_low(jd),
+           10000)
+    report("equinox_approx", lambda: equinox.equinox_approx(2000, "spring"),
+           10000)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmarks of the optimized call paths.")
+    parser.add_argument("--tree", default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), os.pardir),
+        help="source tree holding the astronomia package to time, default "
+        "the tree of this script")
+    parser.add_argument("groups", nargs="*", default=sorted(_groups),
+                        choices=sorted(_groups), help="default all")
+    args = parser.parse_args()
+    sys.path.insert(0, os.path.abspath(args.tree))
+
+    import astronomia
+    print("astronomia from " + os.path.dirname(astronomia.__file__))
+    for name in args.groups:
+        print(name + ": " + _groups[name].__doc__)
+        _groups[name]()
+
+
+if __name__ == "__main__":
+    main()
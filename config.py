@@ -26,7 +26,7 @@ USEEPHEM = False
 EPHEMSIMPLESET = -18.7399468035 #correction to align equinox in simple model
 MOONEPHEMSET = -44 #correction to align moon phases
 MOONROTSET = -55
-EARTHROTSET = -160
+EARTHROTSET = -80.46 #texture heading at sidereal time 0 (-160 on solar days)
 
 #Interface settings
 DEBUG = False